@@ -224,9 +224,15 @@ BLOCKCHAIN_CURRENCY = os.environ.get("BLOCKCHAIN_CURRENCY", "MATIC")
 BLOCKCHAIN_RPC_URL = os.environ.get("BLOCKCHAIN_RPC_URL", "https://polygon-rpc.com")
 BLOCKCHAIN_MERCHANT_ADDRESS = os.environ.get("BLOCKCHAIN_MERCHANT_ADDRESS", "")
 BLOCKCHAIN_MIN_CONFIRMATIONS = int(os.environ.get("BLOCKCHAIN_MIN_CONFIRMATIONS", "3"))
+# Ping the RPC endpoint once at startup (off by default so management commands stay offline)
+BLOCKCHAIN_WARMUP = os.environ.get("BLOCKCHAIN_WARMUP", "false").lower() == "true"
 # Naive price for quotes (local currency per 1 token); set via env in production
 BLOCKCHAIN_PRICE_INR_PER_TOKEN = os.environ.get("BLOCKCHAIN_PRICE_INR_PER_TOKEN", "100.0")
 
+# Mine ledger blocks on a background thread after commit instead of inside the request.
+# Off by default: queued blocks live in process memory until the worker writes them.
+LEDGER_ASYNC = os.environ.get("LEDGER_ASYNC", "false").lower() == "true"
+
 # Platform bank/UPI details for offline payments and wallet recharges
 PLATFORM_UPI_VPA = os.environ.get("PLATFORM_UPI_VPA", "")
 PLATFORM_BANK_HOLDER_NAME = os.environ.get("PLATFORM_BANK_HOLDER_NAME", "")
@@ -15,14 +15,14 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'auction_site.settings')
 
 application = get_wsgi_application()
 
-# Attempt to run pending migrations automatically on startup.
-# This helps ensure new tables (e.g., `auctions_userprofile`) exist in
-# environments where deploy pipelines don't run `manage.py migrate`.
-try:
-    from django.core.management import call_command
-    # Idempotent: safe to call on every worker start
-    call_command('migrate', interactive=False, run_syncdb=True, verbosity=0)
-except Exception:
-    # If migrations fail here (e.g., read-only context), continue serving.
-    # Admin can run migrations manually via CLI.
-    pass
+# Migrations run once in start_django.sh / the release step, not on every
+# worker boot. Deploy pipelines that cannot run `manage.py migrate` can opt
+# back in with RUN_MIGRATIONS_ON_BOOT=1.
+if os.environ.get('RUN_MIGRATIONS_ON_BOOT') == '1':
+    try:
+        from django.core.management import call_command
+        call_command('migrate', interactive=False, run_syncdb=True, verbosity=0)
+    except Exception:
+        # If migrations fail here (e.g., read-only context), continue serving.
+        # Admin can run migrations manually via CLI.
+        pass
@@ -1,6 +1,22 @@
+import logging
+
 from django.apps import AppConfig
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
 
 
 class AuctionsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'auctions'
+
+    def ready(self):
+        # Open the shared RPC connection at boot so the first payment
+        # confirmation doesn't pay for DNS/TLS setup.
+        if not (getattr(settings, 'BLOCKCHAIN_ENABLED', True) and getattr(settings, 'BLOCKCHAIN_WARMUP', False)):
+            return
+        from .blockchain import warm_up
+        try:
+            warm_up()
+        except Exception as e:
+            logger.warning("Blockchain RPC warm-up failed: %s", e)
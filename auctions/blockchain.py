@@ -1,13 +1,23 @@
 from __future__ import annotations
 
+import logging
 from dataclasses import dataclass
 from decimal import Decimal
+from functools import lru_cache
 from typing import Optional, Dict, Any
 
+import requests
+from requests.adapters import HTTPAdapter
 from django.conf import settings
 from web3 import Web3
 
 
+logger = logging.getLogger(__name__)
+
+_WEI_PER_TOKEN = Decimal(10) ** 18
+_QUANT_18 = Decimal('1E-18')
+
+
 @dataclass
 class Quote:
     token_symbol: str
@@ -16,28 +26,84 @@ class Quote:
     wei_amount: int
 
 
-def get_web3() -> Web3:
+@lru_cache(maxsize=1)
+def _get_session(rpc_url: str) -> requests.Session:
+    # One pooled HTTP session per RPC URL, shared by the Web3 client and batch calls
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+@lru_cache(maxsize=1)
+def _get_web3(rpc_url: str) -> Web3:
+    return Web3(Web3.HTTPProvider(rpc_url, request_kwargs={"timeout": 15}, session=_get_session(rpc_url)))
+
+
+def _get_rpc_url() -> str:
     rpc_url = getattr(settings, 'BLOCKCHAIN_RPC_URL', '')
     if not rpc_url:
         raise RuntimeError('BLOCKCHAIN_RPC_URL not configured')
-    return Web3(Web3.HTTPProvider(rpc_url, request_kwargs={"timeout": 15}))
+    return rpc_url
+
+
+def get_web3() -> Web3:
+    return _get_web3(_get_rpc_url())
+
+
+def warm_up() -> None:
+    """Build the shared client and open its connection pool with one cheap call."""
+    get_web3().eth.chain_id
+
+
+def _batch_rpc(calls):
+    """Send several JSON-RPC calls in one HTTP round-trip; returns raw results in call order."""
+    rpc_url = _get_rpc_url()
+    payload = [
+        {"jsonrpc": "2.0", "id": i, "method": method, "params": params}
+        for i, (method, params) in enumerate(calls)
+    ]
+    response = _get_session(rpc_url).post(rpc_url, json=payload, timeout=15)
+    response.raise_for_status()
+    by_id = {entry.get('id'): entry for entry in response.json()}
+    return [by_id.get(i, {}).get('result') for i in range(len(calls))]
+
+
+def _hex_to_int(value) -> int:
+    if value is None:
+        return 0
+    if isinstance(value, str):
+        return int(value, 16)
+    return int(value)
+
+
+@lru_cache(maxsize=8)
+def _parse_price(raw_price: str) -> Decimal:
+    # Keyed on the raw setting value, so a changed setting is simply a new entry
+    return Decimal(raw_price)
 
 
 def inr_to_token_quote(inr_amount: Decimal) -> Quote:
     token_symbol = getattr(settings, 'BLOCKCHAIN_CURRENCY', 'MATIC')
-    price_per_token = Decimal(str(getattr(settings, 'BLOCKCHAIN_PRICE_INR_PER_TOKEN', '100.0')))
+    price_per_token = _parse_price(str(getattr(settings, 'BLOCKCHAIN_PRICE_INR_PER_TOKEN', '100.0')))
     if price_per_token <= 0:
         raise ValueError('Invalid BLOCKCHAIN_PRICE_INR_PER_TOKEN')
-    token_amount = (inr_amount / price_per_token).quantize(Decimal('0.000000000000000001'))
-    wei_amount = int(token_amount * Decimal(10**18))
+    token_amount = (inr_amount / price_per_token).quantize(_QUANT_18)
+    wei_amount = int(token_amount * _WEI_PER_TOKEN)
     return Quote(token_symbol=token_symbol, fiat_amount_inr=inr_amount, token_amount=token_amount, wei_amount=wei_amount)
 
 
+@lru_cache(maxsize=4096)
+def _checksum(address_lower: str) -> str:
+    # EIP-55 needs a Keccak-256 per address; recipients repeat across payments
+    return Web3.to_checksum_address(address_lower)
+
+
 def checksum_address(address: str) -> str:
-    w3 = get_web3()
-    if not w3.is_address(address):
+    if not Web3.is_address(address):
         raise ValueError('Invalid address')
-    return w3.to_checksum_address(address)
+    return _checksum(address.lower())
 
 
 def get_tx_receipt(tx_hash: str) -> Optional[Dict[str, Any]]:
@@ -46,7 +112,7 @@ def get_tx_receipt(tx_hash: str) -> Optional[Dict[str, Any]]:
         receipt = w3.eth.get_transaction_receipt(tx_hash)
     except (ValueError, TypeError, Exception) as e:
         # Log the error for debugging but don't expose it to user
-        print(f"Error getting transaction receipt: {e}")
+        logger.warning("Error getting transaction receipt: %s", e)
         return None
     if receipt is None:
         return None
@@ -62,23 +128,36 @@ def get_confirmations(tx_block_number: Optional[int]) -> int:
 
 
 def validate_native_transfer(tx_hash: str, expected_to: str, expected_wei: int) -> Dict[str, Any]:
-    w3 = get_web3()
-    receipt = get_tx_receipt(tx_hash)
+    # Receipt, transaction and chain head are fetched in a single batched request
+    try:
+        receipt, tx, latest = _batch_rpc([
+            ('eth_getTransactionReceipt', [tx_hash]),
+            ('eth_getTransactionByHash', [tx_hash]),
+            ('eth_blockNumber', []),
+        ])
+    except Exception as e:
+        # Log the error for debugging but don't expose it to user
+        logger.warning("Error validating transaction: %s", e)
+        return {"ok": False, "reason": "no_receipt"}
     if not receipt:
         return {"ok": False, "reason": "no_receipt"}
-    status_ok = int(receipt.get('status', 0)) == 1
-    tx = w3.eth.get_transaction(tx_hash)
+    tx = tx or {}
+    status_ok = _hex_to_int(receipt.get('status')) == 1
     to_addr = tx.get('to')
-    value = int(tx.get('value', 0))
+    value = _hex_to_int(tx.get('value'))
     # Normalize addresses to checksum for compare
     try:
-        expected_to_cs = w3.to_checksum_address(expected_to)
-        to_addr_cs = w3.to_checksum_address(to_addr) if to_addr else None
+        expected_to_cs = _checksum(expected_to.lower())
+        to_addr_cs = _checksum(to_addr.lower()) if to_addr else None
     except Exception:
         return {"ok": False, "reason": "invalid_address"}
     amount_ok = value >= int(expected_wei)
     to_ok = (to_addr_cs == expected_to_cs)
-    confirmations = get_confirmations(receipt.get('blockNumber'))
+    block_number = receipt.get('blockNumber')
+    if block_number is None or latest is None:
+        confirmations = 0
+    else:
+        confirmations = max(0, _hex_to_int(latest) - _hex_to_int(block_number))
     min_conf = int(getattr(settings, 'BLOCKCHAIN_MIN_CONFIRMATIONS', 3))
     confirmed = confirmations >= min_conf
     return {
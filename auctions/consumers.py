@@ -1,10 +1,37 @@
+import time
+
+from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
 
+from .models import AuctionItem
+
+# item_id -> (exists, expires_at); repeat connects to the same auction skip the DB
+_ITEM_EXISTS_TTL = 60
+_ITEM_EXISTS_MAX = 4096
+_item_exists_cache = {}
+
+
+@database_sync_to_async
+def _item_exists_in_db(item_id):
+    return AuctionItem.objects.filter(pk=item_id, is_active=True).exists()
+
+
+async def _item_exists(item_id):
+    now = time.monotonic()
+    cached = _item_exists_cache.get(item_id)
+    if cached and cached[1] > now:
+        return cached[0]
+    exists = await _item_exists_in_db(item_id)
+    if len(_item_exists_cache) >= _ITEM_EXISTS_MAX:
+        _item_exists_cache.clear()
+    _item_exists_cache[item_id] = (exists, now + _ITEM_EXISTS_TTL)
+    return exists
+
 
 class AuctionConsumer(AsyncJsonWebsocketConsumer):
     async def connect(self):
         self.item_id = self.scope['url_route']['kwargs'].get('item_id')
-        if not self.item_id:
+        if not self.item_id or not await _item_exists(self.item_id):
             await self.close()
             return
         self.group_name = f"auction_{self.item_id}"
@@ -20,7 +47,11 @@ class AuctionConsumer(AsyncJsonWebsocketConsumer):
         pass
 
     async def new_bid(self, event):
-        # Forward bid event to client
+        # Forward bid event to client; the producer encodes the payload once for all viewers
+        payload_json = event.get('payload_json')
+        if payload_json is not None:
+            await self.send(text_data=payload_json)
+            return
         await self.send_json({
             'type': 'new_bid',
             'bid': event.get('bid', {}),
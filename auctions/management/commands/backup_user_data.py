@@ -1,15 +1,18 @@
-import json
+import io
 import os
 import zipfile
 from datetime import datetime
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.conf import settings
+from django.core import serializers
 from django.db import transaction
+from django.db.models import Q
 from django.contrib.auth import get_user_model
 from auctions.models import (
     AuctionItem, Bid, Payment, AuctionParticipant, Order, 
     UserProfile, Wallet, WalletTransaction, WalletHold, LedgerBlock
 )
+from auctions.utils import archive_media, json_dumps, user_info, write_json_stream
 
 User = get_user_model()
 
@@ -32,15 +35,17 @@ class Command(BaseCommand):
         parser.add_argument(
             '--format',
             type=str,
-            choices=['json', 'csv', 'sql'],
+            choices=['json', 'jsonl', 'csv', 'sql'],
             default='json',
-            help='Backup format'
+            help='Backup format (jsonl writes loaddata-compatible rows; csv and sql are not implemented yet)'
         )
 
     def handle(self, *args, **options):
         output_dir = options['output_dir']
         user_id = options.get('user_id')
         backup_format = options['format']
+        if backup_format not in ('json', 'jsonl'):
+            raise CommandError(f'--format {backup_format} is not supported yet; use json or jsonl')
         
         # Create output directory if it doesn't exist
         os.makedirs(output_dir, exist_ok=True)
@@ -66,58 +71,52 @@ class Command(BaseCommand):
             )
             return
 
-        user_data = self.get_user_complete_data(user)
-        
         if backup_format == 'json':
+            user_data = self.get_user_complete_data(user)
             filename = f'user_{user_id}_backup_{timestamp}.json'
             filepath = os.path.join(output_dir, filename)
             with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(user_data, f, indent=2, default=str)
+                f.write(json_dumps(user_data, indent=True))
+        else:
+            # Every table's rows go into one newline-delimited file via Django's serializer
+            filename = f'user_{user_id}_backup_{timestamp}.jsonl'
+            filepath = os.path.join(output_dir, filename)
+            with open(filepath, 'w', encoding='utf-8') as f:
+                for queryset in self.get_user_tables(user):
+                    serializers.serialize('jsonl', queryset.iterator(chunk_size=5000), stream=f)
         
         self.stdout.write(f'User {user.username} data backed up to {filename}')
 
     def backup_all_data(self, output_dir, timestamp, backup_format):
         """Backup all system data"""
-        all_data = self.get_all_system_data()
-        
-        if backup_format == 'json':
-            filename = f'complete_system_backup_{timestamp}.json'
-            filepath = os.path.join(output_dir, filename)
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(all_data, f, indent=2, default=str)
-        
-        # Create compressed backup
+        # Create compressed backup; JSON is streamed straight into the archive
         zip_filename = f'complete_system_backup_{timestamp}.zip'
         zip_path = os.path.join(output_dir, zip_filename)
         
-        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            zipf.write(filepath, os.path.basename(filepath))
+        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED, compresslevel=1) as zipf:
+            if backup_format == 'json':
+                filename = f'complete_system_backup_{timestamp}.json'
+                with io.TextIOWrapper(zipf.open(filename, 'w', force_zip64=True), encoding='utf-8') as f:
+                    self.write_system_data(f)
+            elif backup_format == 'jsonl':
+                # One newline-delimited file per table via Django's serializer
+                for name, queryset in self.get_system_tables():
+                    with io.TextIOWrapper(zipf.open(f'{name}.jsonl', 'w', force_zip64=True), encoding='utf-8') as f:
+                        serializers.serialize('jsonl', queryset.iterator(chunk_size=5000), stream=f)
             
             # Add media files if they exist
-            media_dir = settings.MEDIA_ROOT
-            if os.path.exists(media_dir):
-                for root, dirs, files in os.walk(media_dir):
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        arcname = os.path.relpath(file_path, media_dir)
-                        zipf.write(file_path, f'media/{arcname}')
+            archive_media(zipf, settings.MEDIA_ROOT)
         
         self.stdout.write(f'Complete system backup created: {zip_filename}')
 
     def get_user_complete_data(self, user):
         """Get all data related to a specific user"""
+        # Payments made and received come from one query, split by role afterwards
+        payments = self.serialize_model_data(
+            Payment.objects.filter(Q(buyer=user) | Q(recipient=user))
+        )
         return {
-            'user_info': {
-                'id': user.id,
-                'username': user.username,
-                'email': user.email,
-                'first_name': user.first_name,
-                'last_name': user.last_name,
-                'date_joined': user.date_joined,
-                'last_login': user.last_login,
-                'is_active': user.is_active,
-                'is_staff': user.is_staff,
-            },
+            'user_info': user_info(user),
             'profile': self.serialize_model_data(
                 UserProfile.objects.filter(user=user)
             ),
@@ -125,58 +124,73 @@ class Command(BaseCommand):
                 Wallet.objects.filter(user=user)
             ),
             'wallet_transactions': self.serialize_model_data(
-                WalletTransaction.objects.filter(user=user)
+                user.wallet_transactions.all()
             ),
             'wallet_holds': self.serialize_model_data(
-                WalletHold.objects.filter(user=user)
+                user.wallet_holds.all()
             ),
             'owned_items': self.serialize_model_data(
-                AuctionItem.objects.filter(owner=user)
+                user.owned_items.all()
             ),
             'bids': self.serialize_model_data(
-                Bid.objects.filter(bidder=user)
-            ),
-            'payments': self.serialize_model_data(
-                Payment.objects.filter(buyer=user)
-            ),
-            'payments_received': self.serialize_model_data(
-                Payment.objects.filter(recipient=user)
+                user.bids.all()
             ),
+            'payments': [p for p in payments if p['buyer'] == user.id],
+            'payments_received': [p for p in payments if p['recipient'] == user.id],
             'orders': self.serialize_model_data(
-                Order.objects.filter(buyer=user)
+                user.orders.all()
             ),
             'auction_participations': self.serialize_model_data(
-                AuctionParticipant.objects.filter(user=user)
+                user.auction_participations.all()
             ),
         }
 
-    def get_all_system_data(self):
-        """Get all system data"""
-        return {
-            'backup_timestamp': datetime.now().isoformat(),
-            'users': self.serialize_model_data(User.objects.all()),
-            'profiles': self.serialize_model_data(UserProfile.objects.all()),
-            'wallets': self.serialize_model_data(Wallet.objects.all()),
-            'wallet_transactions': self.serialize_model_data(WalletTransaction.objects.all()),
-            'wallet_holds': self.serialize_model_data(WalletHold.objects.all()),
-            'auction_items': self.serialize_model_data(AuctionItem.objects.all()),
-            'bids': self.serialize_model_data(Bid.objects.all()),
-            'payments': self.serialize_model_data(Payment.objects.all()),
-            'orders': self.serialize_model_data(Order.objects.all()),
-            'auction_participants': self.serialize_model_data(AuctionParticipant.objects.all()),
-            'ledger_blocks': self.serialize_model_data(LedgerBlock.objects.all()),
-        }
+    def get_user_tables(self, user):
+        """Querysets holding a user's rows, in loaddata dependency order"""
+        return [
+            User.objects.filter(pk=user.pk),
+            UserProfile.objects.filter(user=user),
+            Wallet.objects.filter(user=user),
+            user.owned_items.all(),
+            user.wallet_transactions.all(),
+            user.wallet_holds.all(),
+            user.bids.all(),
+            Payment.objects.filter(Q(buyer=user) | Q(recipient=user)),
+            user.orders.all(),
+            user.auction_participations.all(),
+        ]
+
+    def get_system_tables(self):
+        """Tables included in a full system backup, in output order"""
+        return [
+            ('users', User.objects.all()),
+            ('profiles', UserProfile.objects.all()),
+            ('wallets', Wallet.objects.all()),
+            ('wallet_transactions', WalletTransaction.objects.all()),
+            ('wallet_holds', WalletHold.objects.all()),
+            ('auction_items', AuctionItem.objects.all()),
+            ('bids', Bid.objects.all()),
+            ('payments', Payment.objects.all()),
+            ('orders', Order.objects.all()),
+            ('auction_participants', AuctionParticipant.objects.all()),
+            ('ledger_blocks', LedgerBlock.objects.all()),
+        ]
+
+    def write_system_data(self, f):
+        """Stream all system data to f as one JSON object, one row at a time"""
+        return write_json_stream(
+            f,
+            {'backup_timestamp': datetime.now().isoformat()},
+            [(name, self.iter_model_data(queryset)) for name, queryset in self.get_system_tables()],
+        )
+
+    def iter_model_data(self, queryset):
+        """Yield rows as dictionaries straight from the DB cursor"""
+        # values() keeps field names as keys (FKs map to their pk) and skips model instantiation
+        field_names = [field.name for field in queryset.model._meta.fields]
+        for row in queryset.values(*field_names).iterator(chunk_size=2000):
+            yield {k: (v.isoformat() if hasattr(v, 'isoformat') else v) for k, v in row.items()}
 
     def serialize_model_data(self, queryset):
         """Serialize model data to dictionary format"""
-        data = []
-        for obj in queryset:
-            obj_dict = {}
-            for field in obj._meta.fields:
-                value = getattr(obj, field.name)
-                if hasattr(value, 'isoformat'):  # Handle datetime fields
-                    obj_dict[field.name] = value.isoformat()
-                else:
-                    obj_dict[field.name] = value
-            data.append(obj_dict)
-        return data
\ No newline at end of file
+        return list(self.iter_model_data(queryset))
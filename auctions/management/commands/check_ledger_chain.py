@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from auctions.models import LedgerBlock
+
+
+class Command(BaseCommand):
+    help = 'Check ledger chain linkage (contiguous indexes, previous_hash links) in a single streaming pass'
+
+    def handle(self, *args, **options):
+        # Hashes are not recomputed: the timestamp that went into each mined hash is not
+        # stored, so this only catches missing, reordered or relinked blocks
+        errors = 0
+        checked = 0
+        expected_index = 0
+        previous_hash = '0'
+        blocks = LedgerBlock.objects.order_by('index').values_list('index', 'previous_hash', 'hash')
+        for index, block_previous_hash, block_hash in blocks.iterator(chunk_size=5000):
+            if index != expected_index:
+                errors += 1
+                self.stderr.write(self.style.ERROR(f'Block {index}: expected index {expected_index}'))
+            if block_previous_hash != previous_hash:
+                errors += 1
+                self.stderr.write(self.style.ERROR(f'Block {index}: previous_hash does not match block {index - 1}'))
+            expected_index = index + 1
+            previous_hash = block_hash
+            checked += 1
+
+        if errors:
+            self.stdout.write(self.style.ERROR(f'Ledger chain check failed: {errors} problems in {checked} blocks.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Ledger chain linked: {checked} blocks.'))
@@ -3,6 +3,7 @@ import os
 from datetime import datetime
 from django.core.management.base import BaseCommand
 from django.db import transaction
+from django.utils.dateparse import parse_datetime
 from django.contrib.auth import get_user_model
 from auctions.models import (
     AuctionItem, Bid, Payment, AuctionParticipant, Order, 
@@ -11,6 +12,9 @@ from auctions.models import (
 
 User = get_user_model()
 
+# Rows per INSERT / IN (...) lookup; stays under SQLite's bound-parameter limit
+BATCH_SIZE = 500
+
 
 class Command(BaseCommand):
     help = 'Restore data from backup files'
@@ -96,20 +100,24 @@ class Command(BaseCommand):
                 if user_id:
                     users = [u for u in users if u.get('id') == user_id]
                 
+                existing = self.existing_values(User, 'username', [u['username'] for u in users])
+                new_users = []
                 for user_data in users:
-                    user, created = User.objects.get_or_create(
+                    if user_data['username'] in existing:
+                        continue
+                    existing.add(user_data['username'])
+                    new_users.append(User(
                         username=user_data['username'],
-                        defaults={
-                            'email': user_data.get('email', ''),
-                            'first_name': user_data.get('first_name', ''),
-                            'last_name': user_data.get('last_name', ''),
-                            'is_active': user_data.get('is_active', True),
-                            'is_staff': user_data.get('is_staff', False),
-                        }
-                    )
-                    if created:
-                        restored_count += 1
-                        self.stdout.write(f"Created user: {user.username}")
+                        email=user_data.get('email', ''),
+                        first_name=user_data.get('first_name', ''),
+                        last_name=user_data.get('last_name', ''),
+                        is_active=user_data.get('is_active', True),
+                        is_staff=user_data.get('is_staff', False),
+                    ))
+                User.objects.bulk_create(new_users, batch_size=BATCH_SIZE, ignore_conflicts=True)
+                restored_count += len(new_users)
+                for user in new_users:
+                    self.stdout.write(f"Created user: {user.username}")
             
             # Restore user profiles
             if 'profiles' in backup_data:
@@ -117,132 +125,159 @@ class Command(BaseCommand):
                 if user_id:
                     profiles = [p for p in profiles if p.get('user') == user_id]
                 
+                user_ids = {p['user'] for p in profiles}
+                known_users = self.existing_values(User, 'id', user_ids)
+                has_profile = self.existing_values(UserProfile, 'user_id', user_ids)
+                new_profiles = []
                 for profile_data in profiles:
-                    try:
-                        user = User.objects.get(id=profile_data['user'])
-                        profile, created = UserProfile.objects.get_or_create(
-                            user=user,
-                            defaults={
-                                'phone': profile_data.get('phone', ''),
-                                'location': profile_data.get('location', ''),
-                                'upi_vpa': profile_data.get('upi_vpa', ''),
-                                'bank_holder_name': profile_data.get('bank_holder_name', ''),
-                                'bank_account_number': profile_data.get('bank_account_number', ''),
-                                'bank_ifsc': profile_data.get('bank_ifsc', ''),
-                                'auto_debit_consent': profile_data.get('auto_debit_consent', False),
-                            }
-                        )
-                        if created:
-                            restored_count += 1
-                    except User.DoesNotExist:
+                    if profile_data['user'] not in known_users:
                         self.stdout.write(f"User not found for profile: {profile_data.get('user')}")
+                        continue
+                    if profile_data['user'] in has_profile:
+                        continue
+                    has_profile.add(profile_data['user'])
+                    new_profiles.append(UserProfile(
+                        user_id=profile_data['user'],
+                        phone=profile_data.get('phone', ''),
+                        location=profile_data.get('location', ''),
+                        upi_vpa=profile_data.get('upi_vpa', ''),
+                        bank_holder_name=profile_data.get('bank_holder_name', ''),
+                        bank_account_number=profile_data.get('bank_account_number', ''),
+                        bank_ifsc=profile_data.get('bank_ifsc', ''),
+                        auto_debit_consent=profile_data.get('auto_debit_consent', False),
+                    ))
+                UserProfile.objects.bulk_create(new_profiles, batch_size=BATCH_SIZE, ignore_conflicts=True)
+                restored_count += len(new_profiles)
             
             # Restore auction items
             if 'auction_items' in backup_data:
                 items = backup_data['auction_items']
                 
+                known_users = self.existing_values(User, 'id', {i['owner'] for i in items})
+                existing = self.existing_values(AuctionItem, 'id', [i['id'] for i in items])
+                new_items = []
                 for item_data in items:
-                    try:
-                        owner = User.objects.get(id=item_data['owner'])
-                        item, created = AuctionItem.objects.get_or_create(
-                            id=item_data['id'],
-                            defaults={
-                                'owner': owner,
-                                'title': item_data['title'],
-                                'description': item_data.get('description', ''),
-                                'address': item_data.get('address', ''),
-                                'starting_price': item_data['starting_price'],
-                                'buy_now_price': item_data.get('buy_now_price'),
-                                'starts_at': self.parse_datetime(item_data.get('starts_at')),
-                                'ends_at': self.parse_datetime(item_data.get('ends_at')),
-                                'is_active': item_data.get('is_active', True),
-                                'seat_limit': item_data.get('seat_limit', 0),
-                                'is_settled': item_data.get('is_settled', False),
-                                'meet_url': item_data.get('meet_url', ''),
-                            }
-                        )
-                        if created:
-                            restored_count += 1
-                    except User.DoesNotExist:
+                    if item_data['owner'] not in known_users:
                         self.stdout.write(f"Owner not found for item: {item_data.get('title')}")
+                        continue
+                    if item_data['id'] in existing:
+                        continue
+                    existing.add(item_data['id'])
+                    new_items.append(AuctionItem(
+                        id=item_data['id'],
+                        owner_id=item_data['owner'],
+                        title=item_data['title'],
+                        description=item_data.get('description', ''),
+                        address=item_data.get('address', ''),
+                        starting_price=item_data['starting_price'],
+                        buy_now_price=item_data.get('buy_now_price'),
+                        starts_at=self.parse_datetime(item_data.get('starts_at')),
+                        ends_at=self.parse_datetime(item_data.get('ends_at')),
+                        is_active=item_data.get('is_active', True),
+                        seat_limit=item_data.get('seat_limit', 0),
+                        is_settled=item_data.get('is_settled', False),
+                        meet_url=item_data.get('meet_url', ''),
+                    ))
+                AuctionItem.objects.bulk_create(new_items, batch_size=BATCH_SIZE, ignore_conflicts=True)
+                restored_count += len(new_items)
             
             # Restore bids
             if 'bids' in backup_data:
                 bids = backup_data['bids']
                 
+                known_items = self.existing_values(AuctionItem, 'id', {b['item'] for b in bids})
+                known_users = self.existing_values(User, 'id', {b['bidder'] for b in bids})
+                existing = self.existing_values(Bid, 'tx_id', [b['tx_id'] for b in bids])
+                new_bids = []
                 for bid_data in bids:
-                    try:
-                        item = AuctionItem.objects.get(id=bid_data['item'])
-                        bidder = User.objects.get(id=bid_data['bidder'])
-                        bid, created = Bid.objects.get_or_create(
-                            tx_id=bid_data['tx_id'],
-                            defaults={
-                                'item': item,
-                                'bidder': bidder,
-                                'amount': bid_data['amount'],
-                                'created_at': self.parse_datetime(bid_data.get('created_at')),
-                                'is_active': bid_data.get('is_active', True),
-                            }
-                        )
-                        if created:
-                            restored_count += 1
-                    except (AuctionItem.DoesNotExist, User.DoesNotExist):
+                    if bid_data['item'] not in known_items or bid_data['bidder'] not in known_users:
                         self.stdout.write(f"Item or bidder not found for bid: {bid_data.get('tx_id')}")
+                        continue
+                    if bid_data['tx_id'] in existing:
+                        continue
+                    existing.add(bid_data['tx_id'])
+                    new_bids.append(Bid(
+                        tx_id=bid_data['tx_id'],
+                        item_id=bid_data['item'],
+                        bidder_id=bid_data['bidder'],
+                        amount=bid_data['amount'],
+                        created_at=self.parse_datetime(bid_data.get('created_at')),
+                        is_active=bid_data.get('is_active', True),
+                    ))
+                Bid.objects.bulk_create(new_bids, batch_size=BATCH_SIZE, ignore_conflicts=True)
+                restored_count += len(new_bids)
             
             # Restore payments
             if 'payments' in backup_data:
                 payments = backup_data['payments']
                 
+                user_ids = {p[k] for p in payments for k in ('buyer', 'recipient') if p.get(k)}
+                known_users = self.existing_values(User, 'id', user_ids)
+                known_items = self.existing_values(AuctionItem, 'id', {p['item'] for p in payments if p.get('item')})
+                existing = self.existing_values(Payment, 'transaction_id', [p['transaction_id'] for p in payments])
+                new_payments = []
                 for payment_data in payments:
-                    try:
-                        buyer = User.objects.get(id=payment_data['buyer']) if payment_data.get('buyer') else None
-                        item = AuctionItem.objects.get(id=payment_data['item']) if payment_data.get('item') else None
-                        recipient = User.objects.get(id=payment_data['recipient']) if payment_data.get('recipient') else None
-                        
-                        payment, created = Payment.objects.get_or_create(
-                            transaction_id=payment_data['transaction_id'],
-                            defaults={
-                                'item': item,
-                                'buyer': buyer,
-                                'recipient': recipient,
-                                'amount': payment_data['amount'],
-                                'purpose': payment_data.get('purpose', 'order'),
-                                'provider': payment_data.get('provider', 'google_pay'),
-                                'provider_ref': payment_data.get('provider_ref', ''),
-                                'status': payment_data.get('status', 'pending'),
-                                'recipient_upi_vpa': payment_data.get('recipient_upi_vpa', ''),
-                                'recipient_bank_holder_name': payment_data.get('recipient_bank_holder_name', ''),
-                                'recipient_bank_account_number': payment_data.get('recipient_bank_account_number', ''),
-                                'recipient_bank_ifsc': payment_data.get('recipient_bank_ifsc', ''),
-                                'chain': payment_data.get('chain', ''),
-                                'token_symbol': payment_data.get('token_symbol', ''),
-                                'onchain_amount_wei': payment_data.get('onchain_amount_wei', ''),
-                                'recipient_address': payment_data.get('recipient_address', ''),
-                                'payer_address': payment_data.get('payer_address', ''),
-                                'tx_hash': payment_data.get('tx_hash', ''),
-                                'confirmations': payment_data.get('confirmations', 0),
-                                'onchain_status': payment_data.get('onchain_status', ''),
-                                'created_at': self.parse_datetime(payment_data.get('created_at')),
-                                'processed_at': self.parse_datetime(payment_data.get('processed_at')),
-                            }
-                        )
-                        if created:
-                            restored_count += 1
-                    except User.DoesNotExist:
+                    if any(payment_data.get(k) and payment_data[k] not in known_users for k in ('buyer', 'recipient')):
                         self.stdout.write(f"User not found for payment: {payment_data.get('transaction_id')}")
-                    except AuctionItem.DoesNotExist:
+                        continue
+                    if payment_data.get('item') and payment_data['item'] not in known_items:
                         self.stdout.write(f"Item not found for payment: {payment_data.get('transaction_id')}")
+                        continue
+                    if payment_data['transaction_id'] in existing:
+                        continue
+                    existing.add(payment_data['transaction_id'])
+                    new_payments.append(Payment(
+                        transaction_id=payment_data['transaction_id'],
+                        item_id=payment_data.get('item') or None,
+                        buyer_id=payment_data.get('buyer') or None,
+                        recipient_id=payment_data.get('recipient') or None,
+                        amount=payment_data['amount'],
+                        purpose=payment_data.get('purpose', 'order'),
+                        provider=payment_data.get('provider', 'google_pay'),
+                        provider_ref=payment_data.get('provider_ref', ''),
+                        status=payment_data.get('status', 'pending'),
+                        recipient_upi_vpa=payment_data.get('recipient_upi_vpa', ''),
+                        recipient_bank_holder_name=payment_data.get('recipient_bank_holder_name', ''),
+                        recipient_bank_account_number=payment_data.get('recipient_bank_account_number', ''),
+                        recipient_bank_ifsc=payment_data.get('recipient_bank_ifsc', ''),
+                        chain=payment_data.get('chain', ''),
+                        token_symbol=payment_data.get('token_symbol', ''),
+                        onchain_amount_wei=payment_data.get('onchain_amount_wei', ''),
+                        recipient_address=payment_data.get('recipient_address', ''),
+                        payer_address=payment_data.get('payer_address', ''),
+                        tx_hash=payment_data.get('tx_hash', ''),
+                        confirmations=payment_data.get('confirmations', 0),
+                        onchain_status=payment_data.get('onchain_status', ''),
+                        created_at=self.parse_datetime(payment_data.get('created_at')),
+                        processed_at=self.parse_datetime(payment_data.get('processed_at')),
+                    ))
+                Payment.objects.bulk_create(new_payments, batch_size=BATCH_SIZE, ignore_conflicts=True)
+                restored_count += len(new_payments)
         
         self.stdout.write(
             self.style.SUCCESS(f'Data restoration completed. {restored_count} records restored.')
         )
 
+    def existing_values(self, model, field, values):
+        """Return which of values already exist in model.field, querying in batches"""
+        values = list(values)
+        found = set()
+        for i in range(0, len(values), BATCH_SIZE):
+            found.update(
+                model.objects.filter(**{f'{field}__in': values[i:i + BATCH_SIZE]}).values_list(field, flat=True)
+            )
+        return found
+
     def parse_datetime(self, datetime_str):
         """Parse datetime string from backup"""
         if not datetime_str:
             return None
+        # Backups store isoformat() output, which the C parser handles directly
+        try:
+            return datetime.fromisoformat(datetime_str)
+        except (TypeError, ValueError):
+            pass
         try:
-            from django.utils.dateparse import parse_datetime
             return parse_datetime(datetime_str)
-        except:
-            return None
\ No newline at end of file
+        except (TypeError, ValueError):
+            return None
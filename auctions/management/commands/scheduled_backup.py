@@ -1,19 +1,64 @@
+import io
+import multiprocessing
 import os
-import json
+import tarfile
+import tempfile
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.conf import settings
-from django.db import transaction
+from django.utils import timezone
+from django.db import connection, connections, transaction
 from django.contrib.auth import get_user_model
 from auctions.models import (
     AuctionItem, Bid, Payment, AuctionParticipant, Order, 
     UserProfile, Wallet, WalletTransaction, WalletHold, LedgerBlock,
     DataBackup, DataRetentionPolicy
 )
+from auctions.utils import (
+    CountingWriter, ThreadedWriter, archive_media, json_dumps, row_dict_fn, user_info, write_json_stream
+)
+
+try:
+    import zstandard
+except ImportError:  # only needed for --archive-format tar.zst
+    zstandard = None
 
 User = get_user_model()
 
+# Users handled per prefetch chunk / DataBackup bulk insert in user_data backups
+USER_BATCH_SIZE = 500
+
+# Reverse relations exported for each user
+USER_RELATED_SETS = (
+    'wallet_transactions', 'wallet_holds', 'owned_items', 'bids',
+    'payments', 'payments_received', 'orders', 'auction_participations',
+)
+
+# Retention policy data_type -> model backed up for it
+MODEL_REGISTRY = {
+    'user_profiles': UserProfile,
+    'auction_items': AuctionItem,
+    'bids': Bid,
+    'payments': Payment,
+    'orders': Order,
+    'wallet_transactions': WalletTransaction,
+    'ledger_blocks': LedgerBlock,
+    'auction_participants': AuctionParticipant,
+}
+
+# Policies are written to distinct files, so a few can run side by side
+POLICY_WORKERS = 4
+
+
+def _run_policy(policy_id, output_dir, timestamp, encrypt):
+    """Back up one retention policy in a worker process"""
+    # Never reuse a connection inherited from the parent across fork
+    connections.close_all()
+    policy = DataRetentionPolicy.objects.get(pk=policy_id)
+    Command().backup_policy(policy, MODEL_REGISTRY[policy.data_type], output_dir, timestamp, encrypt)
+
 
 class Command(BaseCommand):
     help = 'Perform scheduled data backup for permanent storage'
@@ -37,11 +82,28 @@ class Command(BaseCommand):
             action='store_true',
             help='Encrypt backup files'
         )
+        parser.add_argument(
+            '--archive-format',
+            type=str,
+            choices=['zip', 'tar.zst'],
+            default='zip',
+            help='Container for system_full backups (tar.zst needs the zstandard package)'
+        )
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=0,
+            help='Run scheduled policies in this many worker processes (0 = threads)'
+        )
 
     def handle(self, *args, **options):
         backup_type = options['backup_type']
         output_dir = options['output_dir']
         encrypt = options['encrypt']
+        archive_format = options['archive_format']
+        self.processes = options['processes']
+        if archive_format == 'tar.zst' and zstandard is None:
+            raise CommandError('--archive-format tar.zst requires the zstandard package')
         
         # Create output directory if it doesn't exist
         os.makedirs(output_dir, exist_ok=True)
@@ -50,7 +112,10 @@ class Command(BaseCommand):
         
         try:
             if backup_type == 'system_full':
-                self.perform_full_system_backup(output_dir, timestamp, encrypt)
+                if archive_format == 'tar.zst':
+                    self.perform_full_system_backup_zst(output_dir, timestamp, encrypt)
+                else:
+                    self.perform_full_system_backup(output_dir, timestamp, encrypt)
             elif backup_type == 'incremental':
                 self.perform_incremental_backup(output_dir, timestamp, encrypt)
             elif backup_type == 'user_data':
@@ -68,32 +133,29 @@ class Command(BaseCommand):
 
     def perform_full_system_backup(self, output_dir, timestamp, encrypt):
         """Perform full system backup"""
-        all_data = self.get_all_system_data()
-        
         filename = f'full_system_backup_{timestamp}.json'
-        filepath = os.path.join(output_dir, filename)
-        
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(all_data, f, indent=2, default=str)
         
-        # Create compressed backup
+        # Create compressed backup; JSON is streamed straight into the archive
         zip_filename = f'full_system_backup_{timestamp}.zip'
         zip_path = os.path.join(output_dir, zip_filename)
         
-        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            zipf.write(filepath, os.path.basename(filepath))
-            
-            # Add media files if they exist
-            media_dir = settings.MEDIA_ROOT
-            if os.path.exists(media_dir):
-                for root, dirs, files in os.walk(media_dir):
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        arcname = os.path.relpath(file_path, media_dir)
-                        zipf.write(file_path, f'media/{arcname}')
+        with open(zip_path, 'wb') as raw:
+            with zipfile.ZipFile(raw, 'w', zipfile.ZIP_DEFLATED, compresslevel=1) as zipf:
+                # Compression and disk writes run on a background thread while rows are fetched
+                with io.TextIOWrapper(zipf.open(filename, 'w', force_zip64=True), encoding='utf-8') as zf, \
+                        ThreadedWriter(zf) as f:
+                    counts = write_json_stream(
+                        f,
+                        {'backup_timestamp': datetime.now().isoformat()},
+                        self.iter_system_data(),
+                    )
+                
+                # Add media files if they exist
+                archive_media(zipf, settings.MEDIA_ROOT)
+            # The archive ends with its central directory, so the position is the file size
+            backup_size = raw.tell()
         
         # Record backup in database
-        backup_size = os.path.getsize(zip_path)
         DataBackup.objects.create(
             backup_type='system_full',
             backup_file_path=zip_path,
@@ -101,50 +163,98 @@ class Command(BaseCommand):
             is_encrypted=encrypt,
             status='completed',
             metadata={
-                'total_users': User.objects.count(),
-                'total_items': AuctionItem.objects.count(),
-                'total_payments': Payment.objects.count(),
+                # Counted from the rows already dumped above; no extra COUNT queries
+                'total_users': counts['users'],
+                'total_items': counts['auction_items'],
+                'total_payments': counts['payments'],
             }
         )
         
         self.stdout.write(f'Full system backup created: {zip_filename}')
 
+    def perform_full_system_backup_zst(self, output_dir, timestamp, encrypt):
+        """Perform full system backup as a multithreaded zstd-compressed tarball"""
+        filename = f'full_system_backup_{timestamp}.json'
+        tar_filename = f'full_system_backup_{timestamp}.tar.zst'
+        tar_path = os.path.join(output_dir, tar_filename)
+        
+        # Tar headers need the member size up front, so the JSON is spooled first
+        with tempfile.TemporaryFile(dir=output_dir) as spool:
+            f = CountingWriter(spool)
+            counts = write_json_stream(
+                f,
+                {'backup_timestamp': datetime.now().isoformat()},
+                self.iter_system_data(),
+            )
+            spool.seek(0)
+            
+            cctx = zstandard.ZstdCompressor(level=3, threads=-1)
+            with open(tar_path, 'wb') as raw:
+                with cctx.stream_writer(raw, closefd=False) as zw:
+                    with tarfile.open(fileobj=zw, mode='w|') as tar:
+                        info = tarfile.TarInfo(filename)
+                        info.size = f.n
+                        info.mtime = int(datetime.now().timestamp())
+                        tar.addfile(info, spool)
+                        if os.path.exists(settings.MEDIA_ROOT):
+                            tar.add(settings.MEDIA_ROOT, arcname='media')
+                backup_size = raw.tell()
+        
+        DataBackup.objects.create(
+            backup_type='system_full',
+            backup_file_path=tar_path,
+            backup_size=backup_size,
+            is_encrypted=encrypt,
+            status='completed',
+            metadata={
+                'format': 'tar.zst',
+                'total_users': counts['users'],
+                'total_items': counts['auction_items'],
+                'total_payments': counts['payments'],
+            }
+        )
+        
+        self.stdout.write(f'Full system backup created: {tar_filename}')
+
     def perform_incremental_backup(self, output_dir, timestamp, encrypt):
         """Perform incremental backup of data changed in last 24 hours"""
         yesterday = datetime.now() - timedelta(days=1)
         
-        incremental_data = {
+        header = {
             'backup_timestamp': datetime.now().isoformat(),
             'backup_type': 'incremental',
             'since': yesterday.isoformat(),
-            'users': self.serialize_model_data(
+        }
+        sections = [
+            ('users', self.iter_model_data(
                 User.objects.filter(date_joined__gte=yesterday)
-            ),
-            'auction_items': self.serialize_model_data(
+            )),
+            ('auction_items', self.iter_model_data(
                 AuctionItem.objects.filter(created_at__gte=yesterday)
-            ),
-            'bids': self.serialize_model_data(
+            )),
+            ('bids', self.iter_model_data(
                 Bid.objects.filter(created_at__gte=yesterday)
-            ),
-            'payments': self.serialize_model_data(
+            )),
+            ('payments', self.iter_model_data(
                 Payment.objects.filter(created_at__gte=yesterday)
-            ),
-            'orders': self.serialize_model_data(
+            )),
+            ('orders', self.iter_model_data(
                 Order.objects.filter(created_at__gte=yesterday)
-            ),
-            'wallet_transactions': self.serialize_model_data(
+            )),
+            ('wallet_transactions', self.iter_model_data(
                 WalletTransaction.objects.filter(created_at__gte=yesterday)
-            ),
-        }
+            )),
+        ]
         
         filename = f'incremental_backup_{timestamp}.json'
         filepath = os.path.join(output_dir, filename)
         
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(incremental_data, f, indent=2, default=str)
+        with open(filepath, 'wb') as raw:
+            f = CountingWriter(raw)
+            counts = write_json_stream(f, header, sections)
         
         # Record backup in database
-        backup_size = os.path.getsize(filepath)
+        backup_size = f.n
         DataBackup.objects.create(
             backup_type='incremental',
             backup_file_path=filepath,
@@ -153,7 +263,7 @@ class Command(BaseCommand):
             status='completed',
             metadata={
                 'since': yesterday.isoformat(),
-                'records_backed_up': sum(len(v) for v in incremental_data.values() if isinstance(v, list))
+                'records_backed_up': sum(counts.values())
             }
         )
         
@@ -161,167 +271,200 @@ class Command(BaseCommand):
 
     def perform_user_data_backup(self, output_dir, timestamp, encrypt):
         """Backup all user data individually"""
-        users = User.objects.all()
+        # Related rows are prefetched per chunk of users instead of queried per user
+        users = (
+            User.objects.select_related('profile', 'wallet')
+            .prefetch_related(*USER_RELATED_SETS)
+            .order_by('pk')
+        )
         backed_up_users = 0
+        backup_records = []
         
-        for user in users:
-            user_data = self.get_user_complete_data(user)
+        # All DataBackup rows commit together; bulk_create flushes them in batches
+        with transaction.atomic(savepoint=False):
+            for user in users.iterator(chunk_size=USER_BATCH_SIZE):
+                user_data = self.get_user_complete_data(user)
             
-            filename = f'user_{user.id}_{user.username}_backup_{timestamp}.json'
-            filepath = os.path.join(output_dir, filename)
+                filename = f'user_{user.id}_{user.username}_backup_{timestamp}.json'
+                filepath = os.path.join(output_dir, filename)
             
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(user_data, f, indent=2, default=str)
+                with open(filepath, 'wb') as raw:
+                    f = CountingWriter(raw)
+                    f.write(json_dumps(user_data))
             
-            # Record backup in database
-            backup_size = os.path.getsize(filepath)
-            DataBackup.objects.create(
-                backup_type='user_data',
-                user=user,
-                backup_file_path=filepath,
-                backup_size=backup_size,
-                is_encrypted=encrypt,
-                status='completed',
-                metadata={
-                    'user_id': user.id,
-                    'username': user.username,
-                }
-            )
+                # Record backup in database (flushed in batches)
+                backup_size = f.n
+                backup_records.append(DataBackup(
+                    backup_type='user_data',
+                    user=user,
+                    backup_file_path=filepath,
+                    backup_size=backup_size,
+                    is_encrypted=encrypt,
+                    status='completed',
+                    metadata={
+                        'user_id': user.id,
+                        'username': user.username,
+                    }
+                ))
+                if len(backup_records) >= USER_BATCH_SIZE:
+                    DataBackup.objects.bulk_create(backup_records)
+                    backup_records = []
             
-            backed_up_users += 1
+                backed_up_users += 1
+        
+            if backup_records:
+                DataBackup.objects.bulk_create(backup_records)
         
         self.stdout.write(f'User data backup completed for {backed_up_users} users')
 
     def perform_scheduled_backup(self, output_dir, timestamp, encrypt):
         """Perform scheduled backup based on retention policies"""
-        # Get all retention policies
-        policies = DataRetentionPolicy.objects.all()
+        # Get all retention policies that map to a known model
+        jobs = []
+        for policy in DataRetentionPolicy.objects.all():
+            model = MODEL_REGISTRY.get(policy.data_type)
+            if model is not None:
+                jobs.append((policy, model))
+        
+        processes = min(getattr(self, 'processes', 0), len(jobs), os.cpu_count() or 1)
+        if processes > 1:
+            # JSON encoding is CPU-bound; separate processes sidestep the GIL.
+            # Connections are closed before forking so children open their own.
+            connections.close_all()
+            with multiprocessing.get_context('fork').Pool(processes) as pool:
+                pool.starmap(_run_policy, [
+                    (policy.pk, output_dir, timestamp, encrypt) for policy, _ in jobs
+                ])
+            return
         
-        for policy in policies:
+        with ThreadPoolExecutor(max_workers=POLICY_WORKERS) as executor:
+            futures = [
+                executor.submit(self.backup_policy, policy, model, output_dir, timestamp, encrypt)
+                for policy, model in jobs
+            ]
+            for future in futures:
+                future.result()
+
+    def backup_policy(self, policy, model, output_dir, timestamp, encrypt):
+        """Write one retention policy's backup file and record it"""
+        try:
             self.stdout.write(f'Processing retention policy for {policy.data_type}')
             
-            # Determine which data to backup based on policy
-            if policy.data_type == 'user_profiles':
-                data = self.serialize_model_data(UserProfile.objects.all())
-            elif policy.data_type == 'auction_items':
-                data = self.serialize_model_data(AuctionItem.objects.all())
-            elif policy.data_type == 'bids':
-                data = self.serialize_model_data(Bid.objects.all())
-            elif policy.data_type == 'payments':
-                data = self.serialize_model_data(Payment.objects.all())
-            elif policy.data_type == 'orders':
-                data = self.serialize_model_data(Order.objects.all())
-            elif policy.data_type == 'wallet_transactions':
-                data = self.serialize_model_data(WalletTransaction.objects.all())
-            elif policy.data_type == 'ledger_blocks':
-                data = self.serialize_model_data(LedgerBlock.objects.all())
-            elif policy.data_type == 'auction_participants':
-                data = self.serialize_model_data(AuctionParticipant.objects.all())
-            else:
-                continue
+            changes = self.table_change_count(model)
+            if (changes is not None and policy.last_backed_up_at is not None
+                    and changes == policy.source_change_count):
+                self.stdout.write(f'Skipping unchanged table for {policy.data_type}')
+                return
             
             # Create backup file
             filename = f'{policy.data_type}_backup_{timestamp}.json'
             filepath = os.path.join(output_dir, filename)
             
-            backup_data = {
+            header = {
                 'backup_timestamp': datetime.now().isoformat(),
                 'data_type': policy.data_type,
                 'retention_days': policy.retention_days,
-                'data': data,
             }
             
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(backup_data, f, indent=2, default=str)
+            with open(filepath, 'wb') as raw:
+                f = CountingWriter(raw)
+                counts = write_json_stream(f, header, [('data', self.iter_model_data(model.objects.all()))])
             
-            # Record backup in database
-            backup_size = os.path.getsize(filepath)
-            DataBackup.objects.create(
-                backup_type='scheduled',
-                backup_file_path=filepath,
-                backup_size=backup_size,
-                is_encrypted=encrypt,
-                status='completed',
-                metadata={
-                    'data_type': policy.data_type,
-                    'retention_days': policy.retention_days,
-                    'records_count': len(data),
-                }
+            # Record the backup and the policy's new watermark in one commit
+            with transaction.atomic(savepoint=False):
+                DataBackup.objects.create(
+                    backup_type='scheduled',
+                    backup_file_path=filepath,
+                    backup_size=f.n,
+                    is_encrypted=encrypt,
+                    status='completed',
+                    metadata={
+                        'data_type': policy.data_type,
+                        'retention_days': policy.retention_days,
+                        'records_count': counts['data'],
+                    }
+                )
+                DataRetentionPolicy.objects.filter(pk=policy.pk).update(
+                    last_backed_up_at=timezone.now(),
+                    source_change_count=changes,
+                )
+        finally:
+            # Worker threads each open their own connection; don't leak them
+            connection.close()
+
+    def table_change_count(self, model):
+        """Cumulative insert/update/delete count for model's table, or None if unknown"""
+        # Only Postgres exposes a cheap per-table change counter; elsewhere always back up
+        if connection.vendor != 'postgresql':
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT n_tup_ins + n_tup_upd + n_tup_del FROM pg_stat_user_tables WHERE relname = %s",
+                [model._meta.db_table],
             )
+            row = cursor.fetchone()
+        return row[0] if row else None
 
     def get_user_complete_data(self, user):
         """Get all data related to a specific user"""
+        # Reads the user's related managers, so prefetched rows are used when present
         return {
-            'user_info': {
-                'id': user.id,
-                'username': user.username,
-                'email': user.email,
-                'first_name': user.first_name,
-                'last_name': user.last_name,
-                'date_joined': user.date_joined,
-                'last_login': user.last_login,
-                'is_active': user.is_active,
-                'is_staff': user.is_staff,
-            },
-            'profile': self.serialize_model_data(
-                UserProfile.objects.filter(user=user)
+            'user_info': user_info(user),
+            'profile': self.serialize_instances(
+                [user.profile] if hasattr(user, 'profile') else []
             ),
-            'wallet': self.serialize_model_data(
-                Wallet.objects.filter(user=user)
+            'wallet': self.serialize_instances(
+                [user.wallet] if hasattr(user, 'wallet') else []
             ),
-            'wallet_transactions': self.serialize_model_data(
-                WalletTransaction.objects.filter(user=user)
+            'wallet_transactions': self.serialize_instances(
+                user.wallet_transactions.all()
             ),
-            'wallet_holds': self.serialize_model_data(
-                WalletHold.objects.filter(user=user)
+            'wallet_holds': self.serialize_instances(
+                user.wallet_holds.all()
             ),
-            'owned_items': self.serialize_model_data(
-                AuctionItem.objects.filter(owner=user)
+            'owned_items': self.serialize_instances(
+                user.owned_items.all()
             ),
-            'bids': self.serialize_model_data(
-                Bid.objects.filter(bidder=user)
+            'bids': self.serialize_instances(
+                user.bids.all()
             ),
-            'payments': self.serialize_model_data(
-                Payment.objects.filter(buyer=user)
+            'payments': self.serialize_instances(
+                user.payments.all()
             ),
-            'payments_received': self.serialize_model_data(
-                Payment.objects.filter(recipient=user)
+            'payments_received': self.serialize_instances(
+                user.payments_received.all()
             ),
-            'orders': self.serialize_model_data(
-                Order.objects.filter(buyer=user)
+            'orders': self.serialize_instances(
+                user.orders.all()
             ),
-            'auction_participations': self.serialize_model_data(
-                AuctionParticipant.objects.filter(user=user)
+            'auction_participations': self.serialize_instances(
+                user.auction_participations.all()
             ),
         }
 
-    def get_all_system_data(self):
-        """Get all system data"""
-        return {
-            'backup_timestamp': datetime.now().isoformat(),
-            'users': self.serialize_model_data(User.objects.all()),
-            'profiles': self.serialize_model_data(UserProfile.objects.all()),
-            'wallets': self.serialize_model_data(Wallet.objects.all()),
-            'wallet_transactions': self.serialize_model_data(WalletTransaction.objects.all()),
-            'wallet_holds': self.serialize_model_data(WalletHold.objects.all()),
-            'auction_items': self.serialize_model_data(AuctionItem.objects.all()),
-            'bids': self.serialize_model_data(Bid.objects.all()),
-            'payments': self.serialize_model_data(Payment.objects.all()),
-            'orders': self.serialize_model_data(Order.objects.all()),
-            'auction_participants': self.serialize_model_data(AuctionParticipant.objects.all()),
-            'ledger_blocks': self.serialize_model_data(LedgerBlock.objects.all()),
-        }
+    def iter_system_data(self):
+        """Yield (name, row iterator) per table; rows stream from the cursor one chunk at a time"""
+        tables = [
+            ('users', User.objects.all()),
+            ('profiles', UserProfile.objects.all()),
+            ('wallets', Wallet.objects.all()),
+            ('wallet_transactions', WalletTransaction.objects.all()),
+            ('wallet_holds', WalletHold.objects.all()),
+            ('auction_items', AuctionItem.objects.all()),
+            ('bids', Bid.objects.all()),
+            ('payments', Payment.objects.all()),
+            ('orders', Order.objects.all()),
+            ('auction_participants', AuctionParticipant.objects.all()),
+            ('ledger_blocks', LedgerBlock.objects.all()),
+        ]
+        for name, queryset in tables:
+            yield name, self.iter_model_data(queryset)
 
-    def serialize_model_data(self, queryset):
-        """Serialize model data to dictionary format"""
-        data = []
-        for obj in queryset:
-            obj_dict = {}
-            for field in obj._meta.fields:
-                value = getattr(obj, field.name)
-                if hasattr(value, 'isoformat'):  # Handle datetime fields
-                    obj_dict[field.name] = value.isoformat()
-                else:
-                    obj_dict[field.name] = value
-            data.append(obj_dict)
-        return data
\ No newline at end of file
+    def iter_model_data(self, queryset):
+        """Yield rows as dictionaries straight from the DB cursor"""
+        field_names = [field.name for field in queryset.model._meta.fields]
+        return queryset.values(*field_names).iterator(chunk_size=2000)
+
+    def serialize_instances(self, objs):
+        """Serialize already-loaded model instances; FKs are written as their ids"""
+        return [row_dict_fn(type(obj))(obj) for obj in objs]
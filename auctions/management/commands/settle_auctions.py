@@ -2,7 +2,10 @@ from django.core.management.base import BaseCommand
 from django.utils import timezone
 from django.db import transaction
 from auctions.models import AuctionItem
-from auctions.utils import settle_auction_item
+from auctions.utils import settle_auction_item, settle_auction_items
+
+# Items settled per transaction; their orders, wallet rows and ledger blocks are written together
+SETTLE_BATCH_SIZE = 50
 
 
 class Command(BaseCommand):
@@ -16,12 +19,47 @@ class Command(BaseCommand):
         dry = options['dry_run']
         limit = options['limit']
         now = timezone.now()
-        qs = AuctionItem.objects.filter(is_active=True, is_settled=False, ends_at__lte=now).order_by('ends_at')[:limit]
-        processed = 0
+        # Served by the partial auc_settle_idx index; settlement re-locks each row itself,
+        # so only the columns it checks up front are loaded here
+        qs = (
+            AuctionItem.objects.filter(is_active=True, is_settled=False, ends_at__lte=now)
+            .only('pk', 'is_settled')
+            .with_top_bid(include_id=True)
+            .order_by('ends_at')[:limit]
+        )
+        eligible = []
         for item in qs:
+            if item.highest_bid_id is None:
+                self.stdout.write(self.style.WARNING(f"Skipped item {item.pk} (no active bids)"))
+                continue
             if dry:
-                self.stdout.write(self.style.WARNING(f"[dry-run] Would settle item {item.pk}"))
+                self.stdout.write(self.style.WARNING(
+                    f"[dry-run] Would settle item {item.pk} (winning bid {item.highest_bid_id}, {item.highest_bid_amount})"
+                ))
+                continue
+            eligible.append(item)
+
+        processed = 0
+        for start in range(0, len(eligible), SETTLE_BATCH_SIZE):
+            batch = eligible[start:start + SETTLE_BATCH_SIZE]
+            try:
+                settled = set(settle_auction_items(batch))
+            except Exception as e:
+                # One bad item must not hold back the rest: retry the batch item by item
+                self.stderr.write(self.style.ERROR(f"Batch settlement failed ({e}); settling items one by one"))
+                processed += self.settle_individually(batch)
                 continue
+            for item in batch:
+                if item.pk in settled:
+                    processed += 1
+                    self.stdout.write(self.style.SUCCESS(f"Settled item {item.pk}"))
+                else:
+                    self.stdout.write(self.style.WARNING(f"Skipped item {item.pk} (not eligible or already settled)"))
+        self.stdout.write(self.style.SUCCESS(f"Done. Settled {processed} auctions."))
+
+    def settle_individually(self, items):
+        processed = 0
+        for item in items:
             try:
                 ok = settle_auction_item(item)
                 if ok:
@@ -31,4 +69,4 @@ class Command(BaseCommand):
                     self.stdout.write(self.style.WARNING(f"Skipped item {item.pk} (not eligible or already settled)"))
             except Exception as e:
                 self.stderr.write(self.style.ERROR(f"Error settling item {item.pk}: {e}"))
-        self.stdout.write(self.style.SUCCESS(f"Done. Settled {processed} auctions."))
+        return processed
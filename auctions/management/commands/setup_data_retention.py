@@ -58,27 +58,24 @@ class Command(BaseCommand):
             },
         ]
 
-        created_count = 0
-        updated_count = 0
-
-        for policy_data in policies:
-            policy, created = DataRetentionPolicy.objects.get_or_create(
-                data_type=policy_data['data_type'],
-                defaults=policy_data
-            )
-            
-            if not created:
-                # Update existing policy
-                for key, value in policy_data.items():
-                    setattr(policy, key, value)
-                policy.save()
-                updated_count += 1
-            else:
-                created_count += 1
+        # One INSERT ... ON CONFLICT DO UPDATE for all policies
+        existing = set(
+            DataRetentionPolicy.objects.filter(
+                data_type__in=[p['data_type'] for p in policies]
+            ).values_list('data_type', flat=True)
+        )
+        DataRetentionPolicy.objects.bulk_create(
+            [DataRetentionPolicy(**policy_data) for policy_data in policies],
+            update_conflicts=True,
+            unique_fields=['data_type'],
+            update_fields=['retention_days', 'auto_delete', 'backup_before_delete', 'updated_at'],
+        )
+        updated_count = len(existing)
+        created_count = len(policies) - updated_count
 
         self.stdout.write(
             self.style.SUCCESS(
                 f'Data retention policies setup completed. '
                 f'Created: {created_count}, Updated: {updated_count}'
             )
-        )
\ No newline at end of file
+        )
@@ -1,24 +1,50 @@
 from django.db import migrations, models
+from django.db.models import Q
+import os
 import uuid
 
 
+def _fill_missing_uuids(model, field, batch_size=5000):
+    # Assign UUIDs in memory and write them back in batches instead of one save() per row
+    missing = model.objects.filter(Q(**{f'{field}__isnull': True}) | Q(**{field: ''})).only('pk', field)
+    batch = []
+    for obj in missing.iterator(chunk_size=batch_size):
+        batch.append(obj)
+        if len(batch) >= batch_size:
+            _assign_uuids(model, field, batch, batch_size)
+            batch = []
+    if batch:
+        _assign_uuids(model, field, batch, batch_size)
+
+
+def _assign_uuids(model, field, batch, batch_size):
+    # One urandom read per batch rather than one per uuid4() call
+    blob = os.urandom(16 * len(batch))
+    for i, obj in enumerate(batch):
+        setattr(obj, field, str(uuid.UUID(bytes=blob[i * 16:(i + 1) * 16], version=4)))
+    model.objects.bulk_update(batch, [field], batch_size=batch_size)
+
+
+def _fill_missing_uuids_sql(schema_editor, model, field):
+    # Postgres generates the values server-side in a single UPDATE
+    qn = schema_editor.quote_name
+    column = qn(model._meta.get_field(field).column)
+    schema_editor.execute(
+        f"UPDATE {qn(model._meta.db_table)} SET {column} = gen_random_uuid()::text "
+        f"WHERE {column} IS NULL OR {column} = ''"
+    )
+
+
 def populate_tx_ids(apps, schema_editor):
     Bid = apps.get_model('auctions', 'Bid')
     Payment = apps.get_model('auctions', 'Payment')
+    fill = _fill_missing_uuids
+    if schema_editor.connection.vendor == 'postgresql':
+        fill = lambda model, field: _fill_missing_uuids_sql(schema_editor, model, field)
     # Populate Bid.tx_id
-    for bid in Bid.objects.filter(tx_id__isnull=True):
-        bid.tx_id = str(uuid.uuid4())
-        bid.save(update_fields=['tx_id'])
-    for bid in Bid.objects.filter(tx_id=''):
-        bid.tx_id = str(uuid.uuid4())
-        bid.save(update_fields=['tx_id'])
+    fill(Bid, 'tx_id')
     # Populate Payment.transaction_id
-    for pay in Payment.objects.filter(transaction_id__isnull=True):
-        pay.transaction_id = str(uuid.uuid4())
-        pay.save(update_fields=['transaction_id'])
-    for pay in Payment.objects.filter(transaction_id=''):
-        pay.transaction_id = str(uuid.uuid4())
-        pay.save(update_fields=['transaction_id'])
+    fill(Payment, 'transaction_id')
 
 
 def noop(apps, schema_editor):
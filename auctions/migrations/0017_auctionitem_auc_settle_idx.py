@@ -0,0 +1,17 @@
+# Generated by Django 5.2.3 on 2026-10-15 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0016_add_delivery_pickup_fields'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='auctionitem',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_settled', False)), fields=['ends_at'], name='auc_settle_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.3 on 2026-10-15 09:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0017_auctionitem_auc_settle_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bid',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['item', '-amount', 'created_at'], name='idx_bid_item_active_amount'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.3 on 2026-10-15 09:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0018_bid_bid_item_amount_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='auctionparticipant',
+            index=models.Index(
+                condition=models.Q(('is_booked', True), ('unbooked_at__isnull', True)),
+                fields=['item'],
+                name='part_booked_idx',
+            ),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.3 on 2026-10-15 09:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0019_auctionparticipant_part_booked_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataretentionpolicy',
+            name='last_backed_up_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='dataretentionpolicy',
+            name='source_change_count',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
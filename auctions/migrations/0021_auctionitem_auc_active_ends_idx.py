@@ -0,0 +1,48 @@
+# Generated by Django 5.2.3 on 2026-10-15 09:50
+
+from django.db import migrations, models
+
+
+INDEX = models.Index(fields=['is_active', 'ends_at'], name='auc_active_ends_idx')
+
+
+def create_index(apps, schema_editor):
+    AuctionItem = apps.get_model('auctions', 'AuctionItem')
+    if schema_editor.connection.vendor == 'postgresql':
+        # Build without taking a write lock on a live table
+        qn = schema_editor.quote_name
+        schema_editor.execute(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {qn(INDEX.name)} "
+            f"ON {qn(AuctionItem._meta.db_table)} ({qn('is_active')}, {qn('ends_at')})"
+        )
+    else:
+        schema_editor.add_index(AuctionItem, INDEX)
+
+
+def drop_index(apps, schema_editor):
+    AuctionItem = apps.get_model('auctions', 'AuctionItem')
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {schema_editor.quote_name(INDEX.name)}")
+    else:
+        schema_editor.remove_index(AuctionItem, INDEX)
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('auctions', '0020_dataretentionpolicy_last_backed_up_at_and_more'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(model_name='auctionitem', index=INDEX),
+            ],
+            database_operations=[
+                migrations.RunPython(create_index, reverse_code=drop_index),
+            ],
+        ),
+    ]
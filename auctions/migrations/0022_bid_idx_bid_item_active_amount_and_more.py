@@ -0,0 +1,17 @@
+# Generated by Django 5.2.3 on 2026-10-15 10:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0021_auctionitem_auc_active_ends_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='wallethold',
+            index=models.Index(condition=models.Q(('status', 'active')), fields=['item'], name='idx_hold_item_active'),
+        ),
+    ]
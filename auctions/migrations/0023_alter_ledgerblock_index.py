@@ -0,0 +1,44 @@
+# Generated by Django 5.2.3 on 2026-10-15 10:50
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def renumber_duplicate_indexes(apps, schema_editor):
+    # Appenders racing on a stale tip could write two blocks with the same index. The
+    # first block (by pk) keeps each index; later ones move to the end of the chain so the
+    # unique constraint can be added, and check_ledger_chain reports their broken links.
+    LedgerBlock = apps.get_model('auctions', 'LedgerBlock')
+    duplicated = list(
+        LedgerBlock.objects.values('index').annotate(n=Count('pk')).filter(n__gt=1)
+        .order_by('index').values_list('index', flat=True)
+    )
+    if not duplicated:
+        return
+    next_index = LedgerBlock.objects.aggregate(last=Max('index'))['last'] + 1
+    moved = []
+    for index in duplicated:
+        for block in LedgerBlock.objects.filter(index=index).order_by('pk').only('pk', 'index')[1:]:
+            moved.append((block.pk, index, next_index))
+            block.index = next_index
+            block.save(update_fields=['index'])
+            next_index += 1
+    print(f'\n  Renumbered {len(moved)} ledger blocks with duplicate indexes:')
+    for pk, old_index, new_index in moved:
+        print(f'    block pk={pk}: index {old_index} -> {new_index}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0022_bid_idx_bid_item_active_amount_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(renumber_duplicate_indexes, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='ledgerblock',
+            name='index',
+            field=models.PositiveIntegerField(unique=True),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.3 on 2026-10-15 11:00
+
+import auctions.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0023_alter_ledgerblock_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='bid',
+            name='tx_id',
+            field=models.CharField(default=auctions.models.uuid7, editable=False, max_length=36, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='payment',
+            name='transaction_id',
+            field=models.CharField(default=auctions.models.uuid7, editable=False, max_length=36, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='transaction_id',
+            field=models.UUIDField(default=auctions.models.uuid7, editable=False, unique=True),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.3 on 2026-10-15 11:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0024_time_ordered_tx_ids'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['status', '-created_at'], name='pay_status_created_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.3 on 2026-10-15 11:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auctions', '0025_payment_pay_status_created_idx'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='auctionparticipant',
+            constraint=models.UniqueConstraint(condition=models.Q(('booking_code', ''), _negated=True), fields=('item', 'booking_code'), name='unique_booking_code_per_item'),
+        ),
+    ]
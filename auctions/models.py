@@ -1,11 +1,38 @@
+from functools import cached_property
 from django.db import models
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from django.conf import settings
+import os
+import time
 import uuid
+from datetime import datetime, timezone as dt_timezone
+from zoneinfo import ZoneInfo
 
 User = get_user_model()
 
+_LOCAL_TZ = ZoneInfo(settings.TIME_ZONE)
+
+
+def _fixed_utc_offset(tz):
+    """The zone's UTC offset if it is the same in winter and summer (no DST), else None."""
+    year = datetime.now().year
+    winter = tz.utcoffset(datetime(year, 1, 1))
+    return winter if winter == tz.utcoffset(datetime(year, 7, 1)) else None
+
+
+# Lets the market-hours check shift UTC times instead of doing a zone lookup per call
+_LOCAL_FIXED_OFFSET = _fixed_utc_offset(_LOCAL_TZ)
+
+
+def uuid7():
+    """Time-ordered UUID (RFC 9562 version 7) so new ids append to the end of their index."""
+    value = (time.time_ns() // 1_000_000) << 80 | int.from_bytes(os.urandom(10), 'big')
+    # Set version 7 and the RFC 4122 variant bits
+    value = value & ~(0xF << 76) | (0x7 << 76)
+    value = value & ~(0x3 << 62) | (0x2 << 62)
+    return uuid.UUID(int=value)
+
 
 DELIVERY_MODE_CHOICES = [
     ('home_delivery', 'Home Delivery (Courier/Delivery Boy)'),
@@ -13,6 +40,24 @@ DELIVERY_MODE_CHOICES = [
     ('both',          'Both Options Available'),
 ]
 
+class AuctionItemQuerySet(models.QuerySet):
+    def with_counts(self):
+        """Annotate booked participant counts so list views avoid one COUNT per item."""
+        return self.annotate(participants_count=models.Count(
+            'participants',
+            filter=models.Q(participants__is_booked=True, participants__unbooked_at__isnull=True),
+        ))
+
+    def with_top_bid(self, include_id=False):
+        """Annotate the highest active bid amount, and optionally its id."""
+        # A LIMIT 1 seek on idx_bid_item_active_amount rather than a MAX over a bids join
+        top_bid = Bid.objects.filter(item=models.OuterRef('pk'), is_active=True).order_by('-amount', 'created_at')
+        annotations = {'highest_bid_amount': models.Subquery(top_bid.values('amount')[:1])}
+        if include_id:
+            annotations['highest_bid_id'] = models.Subquery(top_bid.values('pk')[:1])
+        return self.annotate(**annotations)
+
+
 class AuctionItem(models.Model):
     owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='owned_items')
     title = models.CharField(max_length=200)
@@ -36,22 +81,55 @@ class AuctionItem(models.Model):
     call_started_at = models.DateTimeField(null=True, blank=True)
     meet_url = models.URLField(max_length=255, blank=True)
 
+    objects = AuctionItemQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Partial index for the settle_auctions sweep over ended, unsettled items
+            models.Index(
+                fields=['ends_at'],
+                name='auc_settle_idx',
+                condition=models.Q(is_active=True, is_settled=False),
+            ),
+            # Open-for-bidding lookups (accepting_bids_qs) filter on is_active plus the end time
+            models.Index(fields=['is_active', 'ends_at'], name='auc_active_ends_idx'),
+        ]
+
     def __str__(self) -> str:
         return f"{self.title} (#{self.pk})"
 
-    @property
+    @cached_property
     def highest_bid(self):
-        return self.bids.filter(is_active=True).order_by('-amount', 'created_at').first()
+        # Cached per instance: item_detail and its template read it several times, and the
+        # bidder is joined so highest_bid.bidder needs no second query
+        return self.bids.filter(is_active=True).select_related('bidder').order_by('-amount', 'created_at').first()
+
+    @staticmethod
+    def market_open(now) -> bool:
+        """Market open between 06:00 and 01:00 (next day) local time."""
+        if _LOCAL_FIXED_OFFSET is not None and now.tzinfo is dt_timezone.utc:
+            local_hour = (now + _LOCAL_FIXED_OFFSET).hour
+        else:
+            local_hour = now.astimezone(_LOCAL_TZ).hour
+        return local_hour >= 6 or local_hour < 1
 
     def can_accept_bids(self) -> bool:
         now = timezone.now()
         if not (self.is_active and self.starts_at <= now < self.ends_at):
             return False
-        # Market open between 06:00 and 01:00 (next day) local time
-        local_now = timezone.localtime(now)
-        return local_now.hour >= 6 or local_now.hour < 1
-
-    @property
+        return self.market_open(now)
+
+    @classmethod
+    def accepting_bids_qs(cls, now=None):
+        """Items currently open for bidding, filtered entirely in SQL."""
+        now = now or timezone.now()
+        # Market hours depend only on `now`, so they are checked once rather than per row
+        if not cls.market_open(now):
+            return cls.objects.none()
+        return cls.objects.filter(is_active=True, starts_at__lte=now, ends_at__gt=now)
+
+    # cached_property (not property) so a with_counts() annotation can populate it directly
+    @cached_property
     def participants_count(self) -> int:
         return self.participants.filter(is_booked=True, unbooked_at__isnull=True).count()
 
@@ -62,10 +140,18 @@ class Bid(models.Model):
     amount = models.DecimalField(max_digits=12, decimal_places=2)
     created_at = models.DateTimeField(auto_now_add=True)
     is_active = models.BooleanField(default=True)
-    tx_id = models.CharField(max_length=36, unique=True, default=uuid.uuid4, editable=False)
+    tx_id = models.CharField(max_length=36, unique=True, default=uuid7, editable=False)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Serves the highest-bid lookup (item, amount DESC, created_at) over active bids
+            models.Index(
+                fields=['item', '-amount', 'created_at'],
+                name='idx_bid_item_active_amount',
+                condition=models.Q(is_active=True),
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"Bid {self.amount} on {self.item_id} by {self.bidder_id}"
@@ -87,6 +173,21 @@ class AuctionParticipant(models.Model):
 
     class Meta:
         unique_together = ('item', 'user')
+        constraints = [
+            # Lets the seat booking rely on an INSERT/UPDATE failing instead of probing for collisions
+            models.UniqueConstraint(
+                fields=['item', 'booking_code'],
+                condition=~models.Q(booking_code=''),
+                name='unique_booking_code_per_item',
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['item'],
+                name='part_booked_idx',
+                condition=models.Q(is_booked=True, unbooked_at__isnull=True),
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"Participant {self.user_id} in item {self.item_id}"
@@ -105,7 +206,7 @@ class Payment(models.Model):
     offline_method = models.CharField(max_length=20, blank=True, default='')  # upi, imps, neft, rtgs, other
     payer_identifier = models.CharField(max_length=120, blank=True, default='')  # sender UPI VPA or bank last 4
     status = models.CharField(max_length=30, default='pending')
-    transaction_id = models.CharField(max_length=36, unique=True, default=uuid.uuid4, editable=False)
+    transaction_id = models.CharField(max_length=36, unique=True, default=uuid7, editable=False)
     # Snapshot of recipient bank/UPI details at the time of payment (for offline/bank flows)
     recipient_upi_vpa = models.CharField(max_length=120, blank=True, default='')
     recipient_bank_holder_name = models.CharField(max_length=120, blank=True, default='')
@@ -124,6 +225,12 @@ class Payment(models.Model):
     # Indicates that post-payment effects (wallet credit, seat activation, etc.) were applied
     processed_at = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            # Status-filtered payment lists (admin, reconciliation) newest first
+            models.Index(fields=['status', '-created_at'], name='pay_status_created_idx'),
+        ]
+
     def __str__(self) -> str:
         return f"Payment {self.amount} for {self.item_id} ({self.status})"
 
@@ -147,7 +254,8 @@ class Order(models.Model):
 
 
 class LedgerBlock(models.Model):
-    index = models.PositiveIntegerField()
+    # Unique so two appenders racing on a stale tip fail instead of forking the chain
+    index = models.PositiveIntegerField(unique=True)
     timestamp = models.DateTimeField(auto_now_add=True)
     previous_hash = models.CharField(max_length=64)
     data = models.JSONField()
@@ -267,6 +375,10 @@ class WalletHold(models.Model):
                 name='unique_active_hold_per_user_item',
             )
         ]
+        indexes = [
+            # Settlement and bid-release sweeps look up an item's active holds
+            models.Index(fields=['item'], name='idx_hold_item_active', condition=models.Q(status='active')),
+        ]
 
     def __str__(self) -> str:
         return f"Hold ₹{self.amount} on item {self.item_id} ({self.status})"
@@ -289,7 +401,7 @@ class Transaction(models.Model):
         ('FAILED', 'Failed'),
         ('INFO', 'Info'),
     )
-    transaction_id = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    transaction_id = models.UUIDField(default=uuid7, unique=True, editable=False)
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='transactions')
     item = models.ForeignKey('AuctionItem', on_delete=models.SET_NULL, null=True, blank=True, related_name='transactions')
     payment = models.ForeignKey('Payment', on_delete=models.SET_NULL, null=True, blank=True, related_name='transactions')
@@ -342,6 +454,9 @@ class DataRetentionPolicy(models.Model):
     retention_days = models.PositiveIntegerField()
     auto_delete = models.BooleanField(default=False)
     backup_before_delete = models.BooleanField(default=True)
+    # Last scheduled backup, used to skip tables that have not changed since
+    last_backed_up_at = models.DateTimeField(null=True, blank=True)
+    source_change_count = models.BigIntegerField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
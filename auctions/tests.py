@@ -1,9 +1,13 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from decimal import Decimal
-from .models import AuctionItem, Bid, Wallet, WalletHold
-from .utils import get_or_create_wallet, get_available_balance
+from unittest import mock
+from .models import AuctionItem, Bid, LedgerBlock, Order, Payment, Wallet, WalletHold, WalletTransaction
+from .utils import (
+    _drain_ledger_queue, _ledger_queue, apply_payment_effects, get_or_create_wallet, get_available_balance,
+    queue_ledger_block, settle_auction_item, settle_auction_items,
+)
 
 
 class WalletAndBiddingTests(TestCase):
@@ -36,4 +40,101 @@ class WalletAndBiddingTests(TestCase):
         self.assertTrue(bid.tx_id)
         self.assertEqual(len(str(bid.tx_id)), 36)
 
-# Create your tests here.
+    def test_payment_effects_apply_once(self):
+        payment = Payment.objects.create(buyer=self.user, amount=Decimal('50.00'), purpose='recharge', status='succeeded')
+        stale = Payment.objects.get(pk=payment.pk)
+        apply_payment_effects(payment)
+        # A second callback holding an unprocessed copy must not credit again
+        apply_payment_effects(stale)
+        self.assertEqual(Wallet.objects.get(user=self.user).balance, Decimal('50.00'))
+
+    def test_recharge_creates_wallet_then_credits(self):
+        payment = Payment.objects.create(buyer=self.user, amount=Decimal('75.00'), purpose='recharge', status='succeeded')
+        apply_payment_effects(payment)
+        self.assertEqual(Wallet.objects.get(user=self.user).balance, Decimal('75.00'))
+        txn = WalletTransaction.objects.get(user=self.user, kind='credit')
+        self.assertEqual(txn.balance_after, Decimal('75.00'))
+
+    def test_recharge_adds_to_existing_balance(self):
+        Wallet.objects.create(user=self.user, balance=Decimal('100.00'))
+        payment = Payment.objects.create(buyer=self.user, amount=Decimal('25.00'), purpose='recharge', status='succeeded')
+        apply_payment_effects(payment)
+        self.assertEqual(Wallet.objects.get(user=self.user).balance, Decimal('125.00'))
+        txn = WalletTransaction.objects.get(user=self.user, kind='credit')
+        self.assertEqual(txn.balance_after, Decimal('125.00'))
+
+    def test_settle_item_consumes_winner_hold(self):
+        User = get_user_model()
+        loser = User.objects.create_user(username='carol', password='pass')
+        Wallet.objects.create(user=self.user, balance=Decimal('500.00'))
+        Wallet.objects.create(user=loser, balance=Decimal('500.00'))
+        Bid.objects.create(item=self.item, bidder=loser, amount=Decimal('150.00'))
+        Bid.objects.create(item=self.item, bidder=self.user, amount=Decimal('200.00'))
+        WalletHold.objects.create(user=loser, item=self.item, amount=Decimal('150.00'))
+        WalletHold.objects.create(user=self.user, item=self.item, amount=Decimal('200.00'))
+        self.assertTrue(settle_auction_item(self.item))
+        self.assertEqual(Wallet.objects.get(user=self.user).balance, Decimal('300.00'))
+        self.assertEqual(Wallet.objects.get(user=loser).balance, Decimal('500.00'))
+        self.assertEqual(WalletHold.objects.get(user=self.user).status, 'consumed')
+        self.assertEqual(WalletHold.objects.get(user=loser).status, 'released')
+        txn = WalletTransaction.objects.get(user=self.user, kind='hold_consume')
+        self.assertEqual(txn.balance_after, Decimal('300.00'))
+        self.assertEqual(Order.objects.get(item=self.item).buyer, self.user)
+        self.assertTrue(AuctionItem.objects.get(pk=self.item.pk).is_settled)
+        # LEDGER_ASYNC is off by default, so the block is written in the settlement transaction
+        self.assertEqual(LedgerBlock.objects.get().data['winner_id'], self.user.pk)
+        # Already settled: a second call is a no-op
+        self.assertFalse(settle_auction_item(AuctionItem.objects.get(pk=self.item.pk)))
+        self.assertEqual(Wallet.objects.get(user=self.user).balance, Decimal('300.00'))
+
+    def test_settle_items_replays_balance_for_repeat_winner(self):
+        second = AuctionItem.objects.create(
+            owner=self.seller,
+            title='Second Item',
+            address='Addr',
+            starting_price=Decimal('100.00'),
+            starts_at=timezone.now() - timezone.timedelta(hours=1),
+            ends_at=timezone.now() + timezone.timedelta(hours=1),
+        )
+        Wallet.objects.create(user=self.user, balance=Decimal('1000.00'))
+        for item, amount in ((self.item, Decimal('300.00')), (second, Decimal('200.00'))):
+            Bid.objects.create(item=item, bidder=self.user, amount=amount)
+            WalletHold.objects.create(user=self.user, item=item, amount=amount)
+        blocks = []
+        settled = settle_auction_items([self.item, second], blocks)
+        self.assertCountEqual(settled, [self.item.pk, second.pk])
+        self.assertEqual(len(blocks), 2)
+        # One debit for both items
+        self.assertEqual(Wallet.objects.get(user=self.user).balance, Decimal('500.00'))
+        self.assertFalse(WalletHold.objects.filter(user=self.user, status='active').exists())
+        # Each row's balance_after follows on from the previous one, in insert order
+        running = Decimal('1000.00')
+        txns = WalletTransaction.objects.filter(user=self.user, kind='hold_consume').order_by('pk')
+        self.assertEqual(len(txns), 2)
+        for txn in txns:
+            running -= txn.amount
+            self.assertEqual(txn.balance_after, running)
+        self.assertEqual(running, Decimal('500.00'))
+
+
+class LedgerQueueTests(TestCase):
+    @override_settings(LEDGER_ASYNC=False)
+    def test_sync_append_when_async_disabled(self):
+        queue_ledger_block({'type': 'test_event', 'item_id': 1})
+        block = LedgerBlock.objects.get()
+        self.assertEqual(block.data['type'], 'test_event')
+        self.assertTrue(_ledger_queue.empty())
+
+    @override_settings(LEDGER_ASYNC=True)
+    def test_async_enqueues_on_commit(self):
+        payload = {'type': 'test_event', 'item_id': 2}
+        self.addCleanup(_drain_ledger_queue)
+        with mock.patch('auctions.utils._start_ledger_worker') as start_worker:
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                queue_ledger_block(payload)
+                # Nothing is queued until the transaction commits
+                self.assertTrue(_ledger_queue.empty())
+        start_worker.assert_called_once_with()
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(_drain_ledger_queue(), [payload])
+        self.assertFalse(LedgerBlock.objects.exists())
@@ -1,70 +1,404 @@
 from decimal import Decimal
-from django.db import transaction
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import Case, DateField, F, OuterRef, Q, Subquery, Sum, TimeField, Value, When
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from django.conf import settings
+import datetime
 import hashlib
+import itertools
 import json
+import logging
 from .models import (
     AuctionItem, Bid, Payment, AuctionParticipant, Order, 
     UserProfile, Wallet, WalletTransaction, WalletHold, LedgerBlock, Transaction
 )
 import secrets
 import string
-from cryptography.fernet import Fernet
-import base64
 import os
+import queue
+import threading
+import time
+import zipfile
+from functools import lru_cache
+from operator import attrgetter
 
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib encoder
+    orjson = None
 
-def append_ledger_block(data):
-    """Append a new block to the ledger with the given data."""
-    # Get the last block to calculate the hash
-    last_block = LedgerBlock.objects.order_by('-index').first()
-    
-    if last_block:
-        index = last_block.index + 1
-        previous_hash = last_block.hash
+logger = logging.getLogger(__name__)
+
+
+def _json_default(value):
+    """Fallback for values an encoder does not handle natively.
+
+    Dates and times come out as ISO-8601 on the stdlib path too, matching orjson's
+    native output; Decimal, FieldFile and the rest fall back to str().
+    """
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return str(value)
+
+
+def json_dumps(data, indent=False):
+    """Encode data to a JSON string, using orjson when it is installed."""
+    if orjson is not None:
+        option = orjson.OPT_INDENT_2 if indent else 0
+        return orjson.dumps(data, default=_json_default, option=option).decode()
+    if indent:
+        return json.dumps(data, indent=2, ensure_ascii=False, default=_json_default)
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False, default=_json_default)
+
+
+# Account fields exported as 'user_info' in backups
+USER_INFO_FIELDS = (
+    'id', 'username', 'email', 'first_name', 'last_name',
+    'date_joined', 'last_login', 'is_active', 'is_staff',
+)
+_user_info_getter = attrgetter(*USER_INFO_FIELDS)
+
+
+def user_info(user):
+    """The user's USER_INFO_FIELDS as a dict, read with one precomputed getter."""
+    return dict(zip(USER_INFO_FIELDS, _user_info_getter(user)))
+
+
+@lru_cache(maxsize=None)
+def row_dict_fn(model):
+    """Build a function mapping an instance of model to a field-name dict, once per model.
+
+    FKs are read through their attname (the id) so related rows are never loaded;
+    date/time values are written as ISO strings.
+    """
+    fields = model._meta.fields
+    names = tuple(field.name for field in fields)
+    getter = attrgetter(*(field.attname for field in fields))
+    temporal = tuple(i for i, field in enumerate(fields) if isinstance(field, (DateField, TimeField)))
+    if len(names) == 1:
+        single = getter
+        getter = lambda obj: (single(obj),)
+
+    if not temporal:
+        def to_dict(obj):
+            return dict(zip(names, getter(obj)))
     else:
-        index = 0
-        previous_hash = "0"
-    
-    # Create the block data
-    block_data = {
-        'index': index,
-        'timestamp': timezone.now().isoformat(),
-        'previous_hash': previous_hash,
-        'data': data,
-        'nonce': 0
-    }
-    
-    # Simple proof of work (find a hash starting with "0000")
+        def to_dict(obj):
+            values = list(getter(obj))
+            for i in temporal:
+                if values[i] is not None:
+                    values[i] = values[i].isoformat()
+            return dict(zip(names, values))
+    return to_dict
+
+
+class CountingWriter:
+    """Text writer over a binary file that counts the bytes written to it."""
+    __slots__ = ('f', 'n')
+
+    def __init__(self, f):
+        self.f = f
+        self.n = 0
+
+    def write(self, s):
+        data = s.encode('utf-8')
+        self.n += len(data)
+        return self.f.write(data)
+
+
+def write_json_stream(f, header, sections):
+    """Write one JSON object to text file f, streaming each section's rows.
+
+    header is a dict of small top-level values; sections is a list of
+    (name, iterable of rows). Returns the number of rows written per section.
+    """
+    counts = {}
+    sep = ''
+    f.write('{')
+    for key, value in header.items():
+        f.write(f'{sep}{json_dumps(key)}:{json_dumps(value)}')
+        sep = ','
+    for name, rows in sections:
+        f.write(f'{sep}{json_dumps(name)}:[')
+        sep = ','
+        count = 0
+        for row in rows:
+            if count:
+                f.write(',\n')
+            f.write(json_dumps(row))
+            count += 1
+        f.write(']')
+        counts[name] = count
+    f.write('}\n')
+    return counts
+
+
+class ThreadedWriter:
+    """Text writer that hands buffered chunks to a background thread.
+
+    Lets encoding, compression and disk writes overlap with the caller's
+    database reads; the queue is bounded so memory stays flat.
+    """
+
+    def __init__(self, f, chunk_size=1 << 20, max_pending=8):
+        self.f = f
+        self.chunk_size = chunk_size
+        self._buf = []
+        self._size = 0
+        self._error = None
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._drain, daemon=True)
+        self._thread.start()
+
+    def _drain(self):
+        while True:
+            chunk = self._queue.get()
+            if chunk is None:
+                return
+            if self._error is None:
+                try:
+                    self.f.write(chunk)
+                except BaseException as exc:
+                    self._error = exc
+
+    def _flush(self):
+        if self._error is not None:
+            raise self._error
+        if self._buf:
+            self._queue.put(''.join(self._buf))
+            self._buf = []
+            self._size = 0
+
+    def write(self, s):
+        self._buf.append(s)
+        self._size += len(s)
+        if self._size >= self.chunk_size:
+            self._flush()
+        return len(s)
+
+    def close(self):
+        try:
+            self._flush()
+        finally:
+            self._queue.put(None)
+            self._thread.join()
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _mine_block(block_data):
+    """Find the first nonce whose block hash starts with "0000"; returns (nonce, hexdigest).
+
+    Hashes exactly what json.dumps(block_data, sort_keys=True) would produce, but the
+    JSON around the nonce is encoded once and the hash state of the prefix is reused.
+    hashlib runs on OpenSSL, which already dispatches to SHA-NI where the CPU has it,
+    so the remaining cost is per-nonce Python work: the low three digits plus tail are
+    prebuilt and the leading digits are absorbed once per thousand nonces.
+    """
+    # The preimage is the stdlib's sort_keys JSON, which every existing block was hashed
+    # over; encoders with other separators or escaping (orjson) would fork the format.
+    # It is built once per block, so its cost is noise next to the nonce search.
+    text = json.dumps({**block_data, 'nonce': None}, sort_keys=True)
+    # Only previous_hash and timestamp sort after nonce, so the last match is the real key
+    head, marker, tail = text.rpartition('"nonce": null')
+    base = hashlib.sha256((head + '"nonce": ').encode())
+    tail = tail.encode()
+    # Four leading hex zeros == two zero bytes == digest sorts below 00 01; one bytes
+    # comparison is cheaper than slicing a new object out of every digest
+    bound = b'\x00\x01'
+    copy = base.copy
+    for nonce in range(1000):
+        h = copy()
+        h.update(b'%d' % nonce + tail)
+        if h.digest() < bound:
+            return nonce, h.hexdigest()
+    low = [b'%03d' % n + tail for n in range(1000)]
+    for high in itertools.count(1):
+        mid = base.copy()
+        mid.update(b'%d' % high)
+        copy = mid.copy
+        for n, suffix in enumerate(low):
+            h = copy()
+            h.update(suffix)
+            if h.digest() < bound:
+                return high * 1000 + n, h.hexdigest()
+
+
+# Arbitrary application-wide key for the ledger's Postgres advisory lock
+LEDGER_LOCK_KEY = 0x4C454447
+
+
+def _lock_ledger():
+    """Serialize ledger appends until the surrounding transaction ends."""
+    connection = transaction.get_connection()
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_xact_lock(%s)', [LEDGER_LOCK_KEY])
+    # Other backends rely on the transaction: SQLite's single writer makes a racing
+    # append fail with "database is locked" rather than fork the chain
+
+
+def append_ledger_block(data, now=None):
+    """Append a new block to the ledger with the given data."""
+    return append_ledger_blocks([data], now)[0]
+
+
+def append_ledger_blocks(payloads, now=None):
+    """Append one block per payload under a single lock, tip read and INSERT.
+
+    Each hash chains on the previous one, so mining stays sequential; batching only
+    removes the per-block lock, tip lookup and INSERT round-trips. Blocks in a batch
+    share one timestamp; callers pass their own ``now`` to stamp them consistently.
+    """
+    timestamp = (now or timezone.now()).isoformat()
+    with transaction.atomic():
+        _lock_ledger()
+        # Get the last block to calculate the hash; only the two columns needed are fetched.
+        # This is a single probe of the unique index's right edge while the lock is held, so a
+        # process-local tip cache would save little and, when stale, cost a full re-mine.
+        last_block = LedgerBlock.objects.order_by('-index').values_list('index', 'hash').first()
+        
+        if last_block:
+            index = last_block[0] + 1
+            previous_hash = last_block[1]
+        else:
+            index = 0
+            previous_hash = "0"
+        
+        blocks = []
+        for data in payloads:
+            # Create the block data
+            block_data = {
+                'index': index,
+                'timestamp': timestamp,
+                'previous_hash': previous_hash,
+                'data': data,
+                'nonce': 0
+            }
+            
+            # Simple proof of work (find a hash starting with "0000")
+            nonce, block_hash = _mine_block(block_data)
+            blocks.append(LedgerBlock(
+                index=index,
+                previous_hash=previous_hash,
+                data=data,
+                nonce=nonce,
+                hash=block_hash
+            ))
+            index += 1
+            previous_hash = block_hash
+        
+        return LedgerBlock.objects.bulk_create(blocks)
+
+
+# Ledger payloads committed by request handlers, mined and inserted by a background thread
+_ledger_queue = queue.Queue()
+_ledger_worker = None
+_ledger_worker_lock = threading.Lock()
+# Attempts per deferred batch, with exponential backoff between them
+LEDGER_WRITE_ATTEMPTS = 5
+# How often the idle worker checks whether the main thread has exited
+LEDGER_POLL_SECONDS = 1
+
+
+def _write_ledger_batch(payloads):
+    """Append a batch of deferred blocks, retrying transient failures with backoff."""
+    for attempt in range(1, LEDGER_WRITE_ATTEMPTS + 1):
+        try:
+            append_ledger_blocks(payloads)
+            return True
+        except Exception:
+            logger.warning(
+                'Deferred ledger append failed (attempt %d of %d)', attempt, LEDGER_WRITE_ATTEMPTS, exc_info=True
+            )
+        finally:
+            # Drop a broken connection so the retry opens a fresh one
+            close_old_connections()
+        if attempt < LEDGER_WRITE_ATTEMPTS:
+            time.sleep(2 ** (attempt - 1))
+    # Logged with the payloads so a batch that never went in can be replayed by hand
+    logger.error('Dropping %d ledger blocks after %d attempts: %r', len(payloads), LEDGER_WRITE_ATTEMPTS, payloads)
+    return False
+
+
+def _drain_ledger_queue():
+    payloads = []
     while True:
-        block_string = json.dumps(block_data, sort_keys=True)
-        block_hash = hashlib.sha256(block_string.encode()).hexdigest()
-        if block_hash.startswith("0000"):
-            break
-        block_data['nonce'] += 1
-    
-    # Create and save the block
-    block = LedgerBlock.objects.create(
-        index=index,
-        previous_hash=previous_hash,
-        data=data,
-        nonce=block_data['nonce'],
-        hash=block_hash
-    )
-    
-    return block
+        try:
+            payloads.append(_ledger_queue.get_nowait())
+        except queue.Empty:
+            return payloads
+
+
+def _run_ledger_worker():
+    # The thread is not a daemon, so interpreter shutdown waits for it: once the main
+    # thread has exited it finishes the batch in hand and whatever is still queued, then
+    # returns. atexit handlers only run after that join, so none is needed.
+    while True:
+        try:
+            payloads = [_ledger_queue.get(timeout=LEDGER_POLL_SECONDS)]
+        except queue.Empty:
+            if not threading.main_thread().is_alive():
+                return
+            continue
+        # Whatever queued up while the previous batch was mining goes in as one batch
+        payloads.extend(_drain_ledger_queue())
+        _write_ledger_batch(payloads)
 
 
-def get_available_balance(user):
-    """Get available wallet balance excluding holds."""
-    wallet = get_or_create_wallet(user)
-    total_holds = sum(
-        hold.amount for hold in WalletHold.objects.filter(
+def _start_ledger_worker():
+    global _ledger_worker
+    with _ledger_worker_lock:
+        if _ledger_worker is None or not _ledger_worker.is_alive():
+            _ledger_worker = threading.Thread(target=_run_ledger_worker, name='ledger-writer')
+            _ledger_worker.start()
+
+
+def queue_ledger_block(data):
+    """Append a ledger block once the current transaction commits, off the request thread.
+
+    Proof-of-work mining then no longer holds up the response. With LEDGER_ASYNC off (the
+    default) the block is appended synchronously inside the caller's transaction instead.
+    """
+    if not getattr(settings, 'LEDGER_ASYNC', False):
+        append_ledger_block(data)
+        return
+    _start_ledger_worker()
+    # Only committed work is recorded; a rolled-back bid leaves no block behind
+    transaction.on_commit(lambda: _ledger_queue.put(data))
+
+
+def get_available_balance(user, wallet=None):
+    """Get available wallet balance excluding holds.
+
+    Pass ``wallet`` when the caller already has the row (e.g. locked it) so its balance
+    is not read again; only the active holds are then summed.
+    """
+    if wallet is not None:
+        total_holds = WalletHold.objects.filter(
             user=user, status='active'
-        )
-    )
-    return wallet.balance - total_holds
+        ).aggregate(total=Sum('amount'))['total'] or Decimal('0')
+        return wallet.balance - total_holds
+    # Balance and active-hold total in one round-trip; the hold sum is a correlated
+    # subquery served by the active-hold unique constraint's partial index
+    active_holds = WalletHold.objects.filter(
+        user=OuterRef('user'), status='active'
+    ).order_by().values('user').annotate(total=Sum('amount')).values('total')
+    row = Wallet.objects.filter(user=user).annotate(
+        holds=Coalesce(Subquery(active_holds), Value(Decimal('0')))
+    ).values_list('balance', 'holds').first()
+    if row is None:
+        # No wallet yet, so nothing can be held against it
+        return get_or_create_wallet(user).balance
+    balance, holds = row
+    return balance - holds
 
 
 def get_or_create_wallet(user):
@@ -73,95 +407,119 @@ def get_or_create_wallet(user):
     return wallet
 
 
+def _apply_recharge(payment, now):
+    # Add funds to wallet in SQL: a read-modify-write here could overwrite a settlement
+    # debit committed in between
+    Wallet.objects.get_or_create(user_id=payment.buyer_id, defaults={'balance': Decimal('0')})
+    wallets = Wallet.objects.filter(user_id=payment.buyer_id)
+    wallets.update(balance=F('balance') + payment.amount, updated_at=now)
+    balance_after = wallets.values_list('balance', flat=True).get()
+    
+    WalletTransaction.objects.create(
+        user_id=payment.buyer_id,
+        payment=payment,
+        kind='credit',
+        amount=payment.amount,
+        balance_after=balance_after,
+    )
+    Transaction.objects.create(
+        user_id=payment.buyer_id,
+        payment=payment,
+        tx_type='RECHARGE',
+        status='SUCCESS',
+        amount=payment.amount,
+        metadata={'provider': payment.provider, 'provider_ref': payment.provider_ref},
+    )
+
+
+def _apply_seat(payment, now):
+    # Book seat for auction
+    # One upsert on the (item, user) key: books an existing participant row and also
+    # creates it if it is missing, without loading it first. A code clash is caught by
+    # unique_booking_code_per_item and retried inside a savepoint.
+    for attempt in range(BOOKING_CODE_ATTEMPTS):
+        try:
+            with transaction.atomic():
+                AuctionParticipant.objects.bulk_create(
+                    [AuctionParticipant(
+                        item_id=payment.item_id,
+                        user_id=payment.buyer_id,
+                        is_booked=True,
+                        paid=True,
+                        paid_at=now,
+                        booking_code=_generate_booking_code(),
+                    )],
+                    update_conflicts=True,
+                    unique_fields=['item', 'user'],
+                    update_fields=['is_booked', 'paid', 'paid_at', 'booking_code'],
+                )
+            break
+        except IntegrityError:
+            if attempt == BOOKING_CODE_ATTEMPTS - 1:
+                raise
+    _record_item_payment(payment, {'purpose': 'seat'})
+
+
+def _apply_penalty(payment, now):
+    # Clear penalty
+    AuctionParticipant.objects.filter(
+        item_id=payment.item_id, user_id=payment.buyer_id
+    ).update(penalty_due=False)
+    _record_item_payment(payment, {'purpose': 'penalty'})
+
+
+def _apply_order(payment, now):
+    # Create order
+    created_order = Order.objects.create(
+        item_id=payment.item_id,
+        buyer_id=payment.buyer_id,
+        amount=payment.amount,
+        status='paid',
+        paid_at=now,
+    )
+    _record_item_payment(payment, {'purpose': payment.purpose, 'order_id': created_order.pk})
+
+
+def _record_item_payment(payment, metadata):
+    """Record the successful item payment shared by the seat, penalty and order effects."""
+    Transaction.objects.create(
+        user_id=payment.buyer_id,
+        item_id=payment.item_id,
+        payment=payment,
+        tx_type='PAYMENT',
+        status='SUCCESS',
+        amount=payment.amount,
+        metadata=metadata,
+    )
+
+
+# Payment purpose -> effect; unknown purposes are only marked processed
+PAYMENT_EFFECTS = {
+    'recharge': _apply_recharge,
+    'seat': _apply_seat,
+    'penalty': _apply_penalty,
+    'order': _apply_order,
+    'buy_now': _apply_order,
+}
+
+
 def apply_payment_effects(payment):
     """Apply the effects of a successful payment."""
     if payment.processed_at:
         return  # Already processed
     
+    now = timezone.now()
+    effect = PAYMENT_EFFECTS.get(payment.purpose)
+    # Relations are written by id throughout, so the payment's buyer/item rows are never loaded
     with transaction.atomic():
-        if payment.purpose == 'recharge':
-            # Add funds to wallet
-            wallet = get_or_create_wallet(payment.buyer)
-            wallet.balance += payment.amount
-            wallet.save(update_fields=['balance'])
-            
-            WalletTransaction.objects.create(
-                user=payment.buyer,
-                payment=payment,
-                kind='credit',
-                amount=payment.amount,
-                balance_after=wallet.balance,
-            )
-            Transaction.objects.create(
-                user=payment.buyer,
-                payment=payment,
-                tx_type='RECHARGE',
-                status='SUCCESS',
-                amount=payment.amount,
-                metadata={'provider': payment.provider, 'provider_ref': payment.provider_ref},
-            )
-        
-        elif payment.purpose == 'seat':
-            # Book seat for auction
-            participant = AuctionParticipant.objects.filter(
-                item=payment.item, user=payment.buyer
-            ).first()
-            if participant:
-                participant.is_booked = True
-                participant.paid = True
-                participant.paid_at = timezone.now()
-                participant.booking_code = _generate_booking_code()
-                participant.save(update_fields=['is_booked', 'paid', 'paid_at', 'booking_code'])
-            Transaction.objects.create(
-                user=payment.buyer,
-                item=payment.item,
-                payment=payment,
-                tx_type='PAYMENT',
-                status='SUCCESS',
-                amount=payment.amount,
-                metadata={'purpose': 'seat'},
-            )
-        
-        elif payment.purpose == 'penalty':
-            # Clear penalty
-            participant = AuctionParticipant.objects.filter(
-                item=payment.item, user=payment.buyer
-            ).first()
-            if participant:
-                participant.penalty_due = False
-                participant.save(update_fields=['penalty_due'])
-            Transaction.objects.create(
-                user=payment.buyer,
-                item=payment.item,
-                payment=payment,
-                tx_type='PAYMENT',
-                status='SUCCESS',
-                amount=payment.amount,
-                metadata={'purpose': 'penalty'},
-            )
-        
-        elif payment.purpose in ('order', 'buy_now'):
-            # Create order
-            created_order = Order.objects.create(
-                item=payment.item,
-                buyer=payment.buyer,
-                amount=payment.amount,
-                status='paid',
-                paid_at=timezone.now(),
-            )
-            Transaction.objects.create(
-                user=payment.buyer,
-                item=payment.item,
-                payment=payment,
-                tx_type='PAYMENT',
-                status='SUCCESS',
-                amount=payment.amount,
-                metadata={'purpose': payment.purpose, 'order_id': created_order.pk},
-            )
-        
-        # Mark payment as processed
-        payment.processed_at = timezone.now()
-        payment.save(update_fields=['processed_at'])
+        # Mark payment as processed; the conditional UPDATE is the claim, so when callbacks
+        # race (or hold a stale copy) only the one that flips processed_at applies effects
+        claimed = Payment.objects.filter(
+            pk=payment.pk, processed_at__isnull=True
+        ).update(processed_at=now)
+        payment.processed_at = now
+        if claimed and effect is not None:
+            effect(payment, now)
 
 
 def settle_auction_item(item):
@@ -169,50 +527,58 @@ def settle_auction_item(item):
     if item.is_settled:
         return False
     
-    # Lock item row to avoid concurrent settlements
-    item = AuctionItem.objects.select_for_update().get(pk=item.pk)
-    highest_bid = item.bids.filter(is_active=True).order_by('-amount', 'created_at').first()
-    if not highest_bid:
-        return False
-    
     with transaction.atomic():
+        # Lock item row to avoid concurrent settlements (bids on the item lock it too).
+        # skip_locked: if another worker is already settling it, move on instead of waiting.
+        item = AuctionItem.objects.select_for_update(skip_locked=True).filter(
+            pk=item.pk, is_settled=False
+        ).first()
+        if item is None:
+            return False
+        highest_bid = item.bids.filter(is_active=True).order_by('-amount', 'created_at').first()
+        if not highest_bid:
+            return False
+        winner_id = highest_bid.bidder_id
+        now = timezone.now()
+        
         # Create order for winner
         order = Order.objects.create(
             item=item,
-            buyer=highest_bid.bidder,
+            buyer_id=winner_id,
             amount=highest_bid.amount,
             status='paid',
-            paid_at=timezone.now(),
+            paid_at=now,
         )
         
-        # Consume the hold amount
-        # Lock hold row if exists
-        hold = WalletHold.objects.select_for_update().filter(
-            item=item, user=highest_bid.bidder, status='active'
-        ).first()
-        if hold:
-            hold.status = 'consumed'
-            hold.save(update_fields=['status', 'updated_at'])
-            
-            # Deduct from wallet (lock row)
-            wallet = get_or_create_wallet(highest_bid.bidder)
-            wallet = Wallet.objects.select_for_update().get(pk=wallet.pk)
-            wallet.balance -= hold.amount
-            wallet.save(update_fields=['balance'])
+        # Consume the winner's hold and release everyone else's in one UPDATE
+        hold_amount = WalletHold.objects.filter(
+            item=item, user_id=winner_id, status='active'
+        ).values_list('amount', flat=True).first()
+        WalletHold.objects.filter(item=item, status='active').update(
+            status=Case(When(user_id=winner_id, then=Value('consumed')), default=Value('released')),
+            updated_at=now,
+        )
+        
+        if hold_amount is not None:
+            # Deduct in SQL so there is no read-modify-write on the balance
+            Wallet.objects.get_or_create(user_id=winner_id, defaults={'balance': Decimal('0')})
+            wallets = Wallet.objects.filter(user_id=winner_id)
+            wallets.update(balance=F('balance') - hold_amount, updated_at=now)
+            balance_after = wallets.values_list('balance', flat=True).get()
             
             WalletTransaction.objects.create(
-                user=highest_bid.bidder,
+                user_id=winner_id,
                 item=item,
                 kind='hold_consume',
-                amount=hold.amount,
-                balance_after=wallet.balance,
+                amount=hold_amount,
+                balance_after=balance_after,
             )
             Transaction.objects.create(
-                user=highest_bid.bidder,
+                user_id=winner_id,
                 item=item,
                 tx_type='PAYMENT',
                 status='SUCCESS',
-                amount=hold.amount,
+                amount=hold_amount,
                 metadata={'settlement': True, 'bid_id': highest_bid.pk},
             )
         
@@ -221,65 +587,172 @@ def settle_auction_item(item):
         item.is_active = False
         item.save(update_fields=['is_settled', 'is_active'])
         
-        # Release all other holds
-        WalletHold.objects.filter(
-            item=item, status='active'
-        ).exclude(user=highest_bid.bidder).update(
-            status='released',
-            updated_at=timezone.now()
-        )
-        
         # Add ledger block
-        append_ledger_block({
+        block = {
             'type': 'auction_settled',
             'item_id': item.pk,
-            'winner_id': highest_bid.bidder.pk,
+            'winner_id': winner_id,
             'winning_amount': str(highest_bid.amount),
             'order_id': order.pk,
-            'timestamp': timezone.now().isoformat(),
-        })
+            'timestamp': now.isoformat(),
+        }
+        queue_ledger_block(block)
     
     return True
 
 
+# Booking code alphabet without easily confused characters (0, O, 1, I, L)
+BOOKING_CODE_CHARS = ''.join(c for c in string.ascii_uppercase + string.digits if c not in 'OIL01')
+
+
+def settle_auction_items(items, pending_blocks=None):
+    """Settle a batch of ended items in one transaction; returns the settled item ids.
+
+    Same effects as settle_auction_item() per item, but orders, wallet rows and
+    transactions are bulk-inserted and holds, wallets and items updated per batch.
+    Only the ledger blocks remain a serial chain.
+    """
+    with transaction.atomic():
+        # Rows are locked and their winning bids resolved in the same statement; items
+        # another worker is settling are skipped
+        winning_bid_ids = [
+            bid_id for bid_id in AuctionItem.objects.select_for_update(skip_locked=True).filter(
+                pk__in=[item.pk for item in items], is_settled=False
+            ).with_top_bid(include_id=True).values_list('highest_bid_id', flat=True) if bid_id is not None
+        ]
+        bids = Bid.objects.only('item_id', 'bidder_id', 'amount').in_bulk(winning_bid_ids)
+        winners = [bids[bid_id] for bid_id in winning_bid_ids]
+        if not winners:
+            return []
+        settled_ids = [bid.item_id for bid in winners]
+        now = timezone.now()
+        
+        orders = Order.objects.bulk_create([
+            Order(item_id=bid.item_id, buyer_id=bid.bidder_id, amount=bid.amount, status='paid', paid_at=now)
+            for bid in winners
+        ])
+        
+        # Consume each winner's hold and release everyone else's in one UPDATE
+        is_winner = Q()
+        for bid in winners:
+            is_winner |= Q(item_id=bid.item_id, user_id=bid.bidder_id)
+        hold_amounts = {
+            (item_id, user_id): amount
+            for item_id, user_id, amount in WalletHold.objects.filter(
+                is_winner, status='active'
+            ).values_list('item_id', 'user_id', 'amount')
+        }
+        WalletHold.objects.filter(item_id__in=settled_ids, status='active').update(
+            status=Case(When(is_winner, then=Value('consumed')), default=Value('released')),
+            updated_at=now,
+        )
+        
+        # One debit per winner, summed over every item they won in this batch
+        debits = {}
+        for (item_id, user_id), amount in hold_amounts.items():
+            debits[user_id] = debits.get(user_id, Decimal('0')) + amount
+        for user_id, total in debits.items():
+            Wallet.objects.get_or_create(user_id=user_id, defaults={'balance': Decimal('0')})
+            Wallet.objects.filter(user_id=user_id).update(balance=F('balance') - total, updated_at=now)
+        # balance_after replays the debits in order from the pre-settlement balance
+        running = {
+            user_id: balance + debits[user_id]
+            for user_id, balance in Wallet.objects.filter(user_id__in=debits).values_list('user_id', 'balance')
+        }
+        wallet_txns = []
+        txns = []
+        for bid in winners:
+            amount = hold_amounts.get((bid.item_id, bid.bidder_id))
+            if amount is None:
+                continue
+            running[bid.bidder_id] -= amount
+            wallet_txns.append(WalletTransaction(
+                user_id=bid.bidder_id,
+                item_id=bid.item_id,
+                kind='hold_consume',
+                amount=amount,
+                balance_after=running[bid.bidder_id],
+            ))
+            txns.append(Transaction(
+                user_id=bid.bidder_id,
+                item_id=bid.item_id,
+                tx_type='PAYMENT',
+                status='SUCCESS',
+                amount=amount,
+                metadata={'settlement': True, 'bid_id': bid.pk},
+            ))
+        WalletTransaction.objects.bulk_create(wallet_txns)
+        Transaction.objects.bulk_create(txns)
+        
+        AuctionItem.objects.filter(pk__in=settled_ids).update(is_settled=True, is_active=False)
+        
+        blocks = [{
+            'type': 'auction_settled',
+            'item_id': bid.item_id,
+            'winner_id': bid.bidder_id,
+            'winning_amount': str(bid.amount),
+            'order_id': order.pk,
+            'timestamp': now.isoformat(),
+        } for bid, order in zip(winners, orders)]
+        if pending_blocks is None:
+            append_ledger_blocks(blocks, now)
+    
+    # Queued only once the settlement has committed
+    if pending_blocks is not None:
+        pending_blocks.extend(blocks)
+    return settled_ids
+
+
+# 31 symbols ** 8 chars leaves a clash per item practically impossible; the retry is a backstop
+BOOKING_CODE_ATTEMPTS = 5
+
+
 def _generate_booking_code(length=8):
     """Generate a unique booking code."""
-    chars = string.ascii_uppercase.replace('O', '').replace('I', '').replace('L', '') + \
-            string.digits.replace('0', '').replace('1', '')
-    return ''.join(secrets.choices(chars, k=length))
+    return ''.join(secrets.choice(BOOKING_CODE_CHARS) for _ in range(length))
 
 
 class DataEncryption:
     """Utility class for encrypting sensitive user data"""
+    # cryptography is imported on first use so importing utils stays cheap for views
     
     @staticmethod
+    @lru_cache(maxsize=1)
     def get_encryption_key():
         """Get or create encryption key"""
+        # Cached so a generated key stays the same for the life of the process
         key = getattr(settings, 'DATA_ENCRYPTION_KEY', None)
         if not key:
+            from cryptography.fernet import Fernet
             # Generate a new key if none exists
             key = Fernet.generate_key()
             # In production, store this securely
             print(f"WARNING: Generated new encryption key. Store this securely: {key.decode()}")
         return key
     
+    @staticmethod
+    @lru_cache(maxsize=1)
+    def get_fernet():
+        """Fernet instance for the process key, built once"""
+        from cryptography.fernet import Fernet
+        return Fernet(DataEncryption.get_encryption_key())
+    
     @staticmethod
     def encrypt_data(data):
         """Encrypt sensitive data"""
         if not data:
             return data
         
-        key = DataEncryption.get_encryption_key()
-        f = Fernet(key)
+        encrypt = DataEncryption.get_fernet().encrypt
         
         if isinstance(data, str):
-            return f.encrypt(data.encode()).decode()
+            return encrypt(data.encode()).decode()
         elif isinstance(data, dict):
             # Encrypt string values in dictionary
             encrypted_data = {}
             for k, v in data.items():
                 if isinstance(v, str) and v:
-                    encrypted_data[k] = f.encrypt(v.encode()).decode()
+                    encrypted_data[k] = encrypt(v.encode()).decode()
                 else:
                     encrypted_data[k] = v
             return encrypted_data
@@ -292,19 +765,18 @@ class DataEncryption:
         if not encrypted_data:
             return encrypted_data
         
-        key = DataEncryption.get_encryption_key()
-        f = Fernet(key)
+        decrypt = DataEncryption.get_fernet().decrypt
         
         try:
             if isinstance(encrypted_data, str):
-                return f.decrypt(encrypted_data.encode()).decode()
+                return decrypt(encrypted_data.encode()).decode()
             elif isinstance(encrypted_data, dict):
                 # Decrypt string values in dictionary
                 decrypted_data = {}
                 for k, v in encrypted_data.items():
                     if isinstance(v, str) and v:
                         try:
-                            decrypted_data[k] = f.decrypt(v.encode()).decode()
+                            decrypted_data[k] = decrypt(v.encode()).decode()
                         except:
                             decrypted_data[k] = v  # Return original if decryption fails
                     else:
@@ -317,15 +789,16 @@ class DataEncryption:
             return encrypted_data
 
 
+SENSITIVE_USER_FIELDS = frozenset({
+    'email', 'phone', 'bank_account_number', 'upi_vpa',
+    'bank_holder_name', 'bank_ifsc',
+})
+
+
 def encrypt_sensitive_user_data(user_data):
     """Encrypt sensitive fields in user data"""
-    sensitive_fields = [
-        'email', 'phone', 'bank_account_number', 'upi_vpa',
-        'bank_holder_name', 'bank_ifsc'
-    ]
-    
     if isinstance(user_data, dict):
-        for field in sensitive_fields:
+        for field in SENSITIVE_USER_FIELDS:
             if field in user_data and user_data[field]:
                 user_data[field] = DataEncryption.encrypt_data(user_data[field])
     
@@ -347,28 +820,59 @@ def create_permanent_data_archive(user_data, archive_path):
     
     # Save to file
     with open(archive_path, 'w', encoding='utf-8') as f:
-        json.dump(archive_data, f, indent=2, default=str)
+        json.dump(archive_data, f, separators=(',', ':'), ensure_ascii=False, default=str)
     
     return archive_path
 
 
+def canonical_json_bytes(data):
+    """Sorted-key JSON bytes that checksums are computed over.
+
+    Always the stdlib encoder with its default separators: orjson rejects non-str dict
+    keys and cannot reproduce this layout, and .checksum files written by earlier
+    releases must still verify.
+    """
+    return json.dumps(data, sort_keys=True, default=str).encode()
+
+
 def verify_data_integrity(data):
     """Verify data integrity using checksums"""
-    data_string = json.dumps(data, sort_keys=True, default=str)
-    checksum = hashlib.sha256(data_string.encode()).hexdigest()
-    return checksum
+    return hashlib.sha256(canonical_json_bytes(data)).hexdigest()
 
 
 def create_data_backup_with_verification(data, backup_path):
     """Create backup with integrity verification"""
-    # Create backup
-    with open(backup_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, default=str)
+    # Serialize once; the file holds exactly the bytes the checksum covers
+    payload = canonical_json_bytes(data)
+    with open(backup_path, 'wb') as f:
+        f.write(payload)
     
     # Calculate and store checksum
-    checksum = verify_data_integrity(data)
+    checksum = hashlib.sha256(payload).hexdigest()
     checksum_path = backup_path + '.checksum'
     with open(checksum_path, 'w') as f:
         f.write(checksum)
     
-    return backup_path, checksum
\ No newline at end of file
+    return backup_path, checksum
+
+
+def iter_files(directory):
+    """Recursively yield file paths under directory using os.scandir."""
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from iter_files(entry.path)
+            elif entry.is_file():
+                yield entry.path
+
+
+def archive_media(zipf, media_dir, prefix='media'):
+    """Add every file under media_dir to an open ZipFile without recompressing it.
+
+    Media is item photos (JPEG/PNG), which deflate gains nothing on.
+    """
+    if not os.path.exists(media_dir):
+        return
+    for file_path in iter_files(media_dir):
+        arcname = os.path.relpath(file_path, media_dir)
+        zipf.write(file_path, f'{prefix}/{arcname}', compress_type=zipfile.ZIP_STORED)